@@ -1,2 +1,4 @@
 python3 src/main.py
-cd docs && python3 -m http.server 8888
+python3 src/main.py --watch &
+trap 'kill $!' EXIT
+python3 src/serve.py --directory docs --port 8888
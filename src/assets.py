@@ -0,0 +1,84 @@
+import json
+import posixpath
+import re
+from pathlib import Path
+
+from manifest import hash_file
+from staging import write_if_changed
+
+# Static files that get content-hashed names. Everything else (favicon.ico, robots.txt,
+# CNAME, .nojekyll...) is fetched by a well-known name and keeps it. Fonts are left
+# out: only stylesheets refer to them, and stylesheets are published unrewritten.
+FINGERPRINTED = frozenset(
+    (
+        ".css", ".js", ".mjs",
+        ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".avif",
+    )
+)
+# url(...) and @import "..." references in a stylesheet.
+_CSS_REFERENCE = re.compile(r"""url\(\s*(['"]?)([^'")]*)\1\s*\)|@import\s+(['"])([^'"]*)\3""")
+ASSET_MANIFEST = "asset-manifest.json"
+HASH_LENGTH = 8
+
+
+def fingerprinted_name(rel: str, digest: str) -> str:
+    """images/logo.png with digest 3f2a9c1b... -> images/logo.3f2a9c1b.png"""
+    path = Path(rel)
+    return path.with_name(f"{path.stem}.{digest[:HASH_LENGTH]}{path.suffix}").as_posix()
+
+
+def fingerprint_assets(static_dir: str | Path) -> dict:
+    """
+    Map the relative path of every fingerprintable file under static_dir to its
+    content-hashed name. A file keeps the same name for as long as its bytes do.
+    Files a stylesheet refers to keep their names too (see css_references), since
+    stylesheets are published as they are.
+    """
+    static_path = Path(static_dir)
+    files = sorted(
+        path
+        for path in static_path.rglob("*")
+        if path.is_file() and path.suffix.lower() in FINGERPRINTED and not path.name.startswith(".")
+    )
+    referenced = set()
+    for path in files:
+        if path.suffix.lower() == ".css":
+            referenced |= css_references(path, static_path)
+    names = {}
+    for path in files:
+        rel = path.relative_to(static_path).as_posix()
+        if rel not in referenced:
+            names[rel] = fingerprinted_name(rel, hash_file(path))
+    return names
+
+
+def css_references(css_path: Path, static_dir: Path) -> set:
+    """
+    The relative paths under static_dir of the files css_path refers to with url()
+    or @import. Site-absolute references ("/images/x.png") are taken from static_dir;
+    external ones (https:, data:, //host) are skipped.
+    """
+    css = css_path.read_text(encoding="utf-8", errors="replace")
+    base = css_path.parent.relative_to(static_dir).as_posix()
+    refs = set()
+    for match in _CSS_REFERENCE.finditer(css):
+        url = (match.group(2) or match.group(4) or "").strip()
+        url = url.split("#", 1)[0].split("?", 1)[0]
+        if not url or url.startswith("//") or ":" in url:
+            continue
+        rel = posixpath.normpath(url.lstrip("/") if url.startswith("/") else posixpath.join(base, url))
+        if not rel.startswith("../"):
+            refs.add(rel)
+    return refs
+
+
+def asset_urls(names: dict) -> dict:
+    """The site-absolute URL mapping for urls.configure_assets."""
+    return {f"/{rel}": f"/{hashed}" for rel, hashed in names.items()}
+
+
+def write_asset_manifest(root: str | Path, names: dict) -> Path:
+    """Write root/asset-manifest.json mapping original asset paths to their fingerprinted ones."""
+    path = Path(root) / ASSET_MANIFEST
+    write_if_changed(path, [json.dumps(names, indent=1, sort_keys=True)])
+    return path
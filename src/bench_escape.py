@@ -0,0 +1,115 @@
+"""
+Benchmark for HTML escaping in the serialiser.
+
+Times HtmlNode.to_html over a synthetic corpus (and the site's own content
+directory, if present) against the unescaped serialiser it replaced, and times
+escape_text itself against html.escape for text with and without special
+characters. Run from the repository root:
+
+    python3 src/bench_escape.py [--shape mixed] [--pages N] [--repeat N]
+"""
+
+import argparse
+import html
+import random
+import time
+from pathlib import Path
+
+from corpus import SHAPES, make_document
+from escaping import escape_text
+from htmlnode import HtmlNode, LeafNode
+from markdown_to_html import markdown_to_html_node
+from urls import URL_ATTRIBUTES
+
+
+def _best(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# The serialiser before escaping, which inserted values verbatim.
+def _unescaped_props_to_html(self, resolve_url=None) -> str:
+    if self.props is None or len(self.props) == 0:
+        return ""
+    if resolve_url is None:
+        return "".join(f' {k}="{v}"' for k, v in self.props.items())
+    return "".join(f' {k}="{resolve_url(v) if k in URL_ATTRIBUTES else v}"' for k, v in self.props.items())
+
+
+def _unescaped_leaf_to_html(self, resolve_url=None) -> str:
+    if self.value is None:
+        raise ValueError("LeafNode requires a value")
+    if self.tag is None:
+        return self.value
+    return f"<{self.tag}{self.props_to_html(resolve_url)}>{self.value}</{self.tag}>"
+
+
+def overhead(func, repeat: int) -> tuple:
+    """(seconds with escaping, seconds with the unescaped serialiser) for func()."""
+    escaped = raw = float("inf")
+    originals = HtmlNode.props_to_html, LeafNode.to_html
+    # Alternated, so neither side is favoured by a warmer cache or CPU clock.
+    for _ in range(repeat):
+        escaped = min(escaped, _best(func, 1))
+        HtmlNode.props_to_html, LeafNode.to_html = _unescaped_props_to_html, _unescaped_leaf_to_html
+        try:
+            raw = min(raw, _best(func, 1))
+        finally:
+            HtmlNode.props_to_html, LeafNode.to_html = originals
+    return escaped, raw
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--shape", choices=sorted(SHAPES), default="mixed")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--page-kb", type=int, default=4)
+    parser.add_argument("--content", default="./content", help="site content directory to include")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=9)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpora = {
+        f"synthetic {args.shape}": [
+            make_document(rng, args.shape, args.page_kb * 1024, f"Page {i}") for i in range(args.pages)
+        ]
+    }
+    content = sorted(Path(args.content).rglob("*.md"))
+    if content:
+        texts = [p.read_text(encoding="utf-8") for p in content]
+        # Repeated up to the synthetic corpus's size: a handful of pages is too quick to time.
+        corpora[str(args.content)] = texts * max(1, args.pages // len(texts))
+
+    print(f"{'corpus':<24}{'to_html s':>12}{'verbatim s':>12}{'overhead':>10}{'render overhead':>18}")
+    for name, texts in corpora.items():
+        nodes = [markdown_to_html_node(t) for t in texts]
+        escaped, raw = overhead(lambda: [node.to_html() for node in nodes], args.repeat)
+        # Parse plus serialise: what escaping adds to rendering a page.
+        render_escaped, render_raw = overhead(
+            lambda: [markdown_to_html_node(t).to_html() for t in texts], args.repeat
+        )
+        print(
+            f"{name:<24}{escaped:>12.4f}{raw:>12.4f}{escaped / raw - 1:>+10.1%}"
+            f"{render_escaped / render_raw - 1:>+18.1%}"
+        )
+
+    print(f"\n{'string':<24}{'escape_text us':>16}{'html.escape us':>16}")
+    samples = {
+        "plain (60 chars)": "the of and to in is was that for on with as by at from his h",
+        "one & (60 chars)": "the of and to in is was that for & with as by at from his h",
+        "markup (60 chars)": "<a href='x'>the</a> & <b>of</b> and to in <i>is</i> was that",
+    }
+    count = 100_000
+    for name, text in samples.items():
+        ours = _best(lambda: [escape_text(text) for _ in range(count)], args.repeat)
+        stdlib = _best(lambda: [html.escape(text, quote=False) for _ in range(count)], args.repeat)
+        print(f"{name:<24}{ours / count * 1e6:>16.3f}{stdlib / count * 1e6:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Memory benchmark for the node classes.
+
+Measures bytes per node for TextNode, LeafNode and ParentNode against plain
+__dict__-backed equivalents, then the peak memory of parsing a synthetic large
+document. Run from the repository root:
+
+    python3 src/bench_nodes.py [--nodes N] [--paragraphs N]
+"""
+
+import argparse
+import tracemalloc
+
+from htmlnode import LeafNode, ParentNode
+from markdown_to_html import markdown_to_html_node
+from textnode import TextNode, TextType
+
+
+class _DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class _DictHtmlNode:
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+def _bytes_per_object(factory, count: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    # Subtract the list of references itself; only the nodes are of interest.
+    return (after - before) / count - 8
+
+
+def synthetic_document(paragraphs: int) -> str:
+    block = (
+        "Some **bold** text, some _italic_ text, a `code span` and a "
+        "[link](https://example.com/page) with an ![image](/images/x.png) in it.\n\n"
+        "- first item\n- second **item**\n- third item\n\n"
+    )
+    return "# Synthetic\n\n" + block * paragraphs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=200_000)
+    parser.add_argument("--paragraphs", type=int, default=5_000)
+    args = parser.parse_args()
+
+    shared = "x" * 16
+    cases = [
+        (
+            "TextNode",
+            lambda i: TextNode(shared, TextType.TEXT),
+            lambda i: _DictTextNode(shared, TextType.TEXT),
+        ),
+        (
+            "LeafNode",
+            lambda i: LeafNode("b", shared),
+            lambda i: _DictHtmlNode("b", shared),
+        ),
+        (
+            "ParentNode",
+            lambda i: ParentNode("p", ()),
+            lambda i: _DictHtmlNode("p", None, ()),
+        ),
+    ]
+    print(f"{'node':<12}{'slots B/node':>14}{'dict B/node':>14}{'saving':>10}")
+    for name, compact, plain in cases:
+        slotted = _bytes_per_object(compact, args.nodes)
+        dicted = _bytes_per_object(plain, args.nodes)
+        print(f"{name:<12}{slotted:>14.1f}{dicted:>14.1f}{1 - slotted / dicted:>10.0%}")
+
+    markdown = synthetic_document(args.paragraphs)
+    tracemalloc.start()
+    node = markdown_to_html_node(markdown)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"\nParsed {len(markdown) / 1e6:.1f} MB of markdown: "
+        f"{current / 1e6:.1f} MB retained, {peak / 1e6:.1f} MB peak "
+        f"({len(node.children)} blocks)"
+    )
+
+
+if __name__ == "__main__":
+    main()
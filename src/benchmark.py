@@ -0,0 +1,175 @@
+"""
+Build benchmark over a synthetic corpus.
+
+Times each pipeline stage separately (markdown_to_blocks, block_to_block_type,
+text_to_textnodes, HtmlNode.to_html, generate_page and the full main()) and reports
+throughput and peak memory. Results can be written to JSON and compared with a
+stored baseline. Run from the repository root:
+
+    python3 src/benchmark.py --shape links --pages 500 --output bench.json
+    python3 src/benchmark.py --shape links --pages 500 --baseline bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import main as site_main
+from block_type import BlockType, block_to_block_type
+from corpus import SHAPES, generate_corpus
+from gencontent import generate_page
+from inline_markdown import text_to_textnodes
+from markdown_blocks import markdown_to_blocks
+from markdown_to_html import configure_inline_cache, inline_cache_info, markdown_to_html_node
+
+
+def _measure(func, repeat: int, setup=None) -> tuple:
+    """
+    Return (best wall time in seconds, peak traced memory in bytes) for func().
+    setup, if given, is called untimed before every run.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    # Peak memory is measured on a separate run so tracing doesn't skew the timings.
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def run(root: Path, repeat: int) -> dict:
+    """Benchmark every stage over the site in root. Returns {stage: metrics}."""
+    sources = sorted((root / "content").rglob("*.md"))
+    texts = [p.read_text(encoding="utf-8") for p in sources]
+    total_bytes = sum(len(t.encode("utf-8")) for t in texts)
+    blocks = [b for t in texts for b in markdown_to_blocks(t)]
+    inline = [b.replace("\n", " ") for b in blocks if block_to_block_type(b) != BlockType.CODE]
+    nodes = [markdown_to_html_node(t) for t in texts]
+    template = str(root / "template.html")
+    out = root / "bench-out"
+
+    def full_build():
+        docs = root / "docs"
+        if docs.exists():
+            for path in sorted(docs.rglob("*"), reverse=True):
+                path.rmdir() if path.is_dir() else path.unlink()
+        cwd = os.getcwd()
+        os.chdir(root)
+        try:
+            # Without the render cache, every repeat times a real build, not cache restores.
+            site_main.main(["--render-cache-size", "0"])
+        finally:
+            os.chdir(cwd)
+
+    stages = {
+        "markdown_to_blocks": lambda: [markdown_to_blocks(t) for t in texts],
+        "block_to_block_type": lambda: [block_to_block_type(b) for b in blocks],
+        "text_to_textnodes": lambda: [text_to_textnodes(t) for t in inline],
+        "to_html": lambda: [n.to_html() for n in nodes],
+        "generate_page": lambda: [
+            generate_page(str(p), template, str(out / f"{i}.html")) for i, p in enumerate(sources)
+        ],
+        "main": full_build,
+    }
+    # The inline cache is process-wide, so the setup pass above and every earlier run
+    # would leave it warm: each run starts from an empty one, as a real build does.
+    inline_cache_size = inline_cache_info().maxsize
+
+    def cold_inline_cache():
+        configure_inline_cache(inline_cache_size)
+
+    results = {}
+    for name, func in stages.items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            seconds, peak = _measure(func, repeat, cold_inline_cache)
+        results[name] = {
+            "seconds": seconds,
+            "mb_per_s": total_bytes / seconds / 1e6 if seconds else None,
+            "pages_per_s": len(sources) / seconds if seconds else None,
+            "peak_mb": peak / 1e6,
+        }
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Print a comparison against baseline; return the stages slower by more than tolerance."""
+    regressions = []
+    print(f"\n{'stage':<22}{'baseline s':>12}{'now s':>12}{'change':>10}")
+    for name, metrics in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        change = metrics["seconds"] / old["seconds"] - 1
+        flag = ""
+        if change > tolerance:
+            regressions.append(name)
+            flag = "  SLOWER"
+        print(f"{name:<22}{old['seconds']:>12.4f}{metrics['seconds']:>12.4f}{change:>+10.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--shape", choices=sorted(SHAPES), default="mixed")
+    parser.add_argument("--pages", type=int, default=200, help="number of regular posts")
+    parser.add_argument("--page-kb", type=int, default=4, help="approximate size of a regular post")
+    parser.add_argument("--huge-pages", type=int, default=0, help="number of very large posts")
+    parser.add_argument("--huge-kb", type=int, default=2048, help="approximate size of a large post")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the best is kept")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a JSON file written by --output")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.10, help="slowdown allowed against the baseline (0.10 = 10%%)"
+    )
+    args = parser.parse_args()
+
+    corpus = {
+        "shape": args.shape,
+        "pages": args.pages,
+        "page_kb": args.page_kb,
+        "huge_pages": args.huge_pages,
+        "huge_kb": args.huge_kb,
+        "seed": args.seed,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        corpus["bytes"] = generate_corpus(
+            root, args.shape, args.pages, args.page_kb * 1024, args.huge_pages, args.huge_kb * 1024, args.seed
+        )
+        results = run(root, args.repeat)
+
+    print(f"Corpus: {corpus['bytes'] / 1e6:.2f} MB, {args.pages + args.huge_pages} pages, shape {args.shape}")
+    print(f"{'stage':<22}{'seconds':>10}{'MB/s':>10}{'pages/s':>10}{'peak MB':>10}")
+    for name, m in results.items():
+        print(f"{name:<22}{m['seconds']:>10.4f}{m['mb_per_s']:>10.2f}{m['pages_per_s']:>10.1f}{m['peak_mb']:>10.1f}")
+
+    if args.output:
+        data = {"python": sys.version.split()[0], "corpus": corpus, "stages": results}
+        Path(args.output).write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        if baseline.get("corpus") != corpus:
+            print("\nWarning: baseline was measured on a different corpus")
+        if compare(results, baseline["stages"], args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import re
 from enum import Enum
+from typing import NamedTuple
 
 
 class BlockType(Enum):
@@ -11,33 +12,71 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 
-def block_to_block_type(block):
-    """Return the BlockType for a single block of markdown. Assumes block is already stripped."""
-    lines = block.split("\n")
+_HEADING = re.compile(r"#{1,6} ")
+_ORDERED_ITEM = re.compile(r"([0-9]+)\. ")
+_QUOTE_PREFIX = re.compile(r">+\s*")
+
+
+class ClassifiedBlock(NamedTuple):
+    """
+    A block's type plus what was learned while classifying it, so the renderer doesn't
+    have to parse the block again. For headings, lists and quotes, lines holds the
+    block's lines and prefixes the length of each line's marker (e.g. "## ", "- ",
+    "10. ", "> "); for paragraphs and code blocks both are None.
+    """
+
+    block_type: BlockType
+    lines: list | None = None
+    prefixes: list | None = None
 
+
+def classify_block(block: str) -> ClassifiedBlock:
+    """Classify a single stripped block of markdown in one pass over its lines."""
     if not block:
-        return BlockType.PARAGRAPH
+        return ClassifiedBlock(BlockType.PARAGRAPH)
 
     # Code: starts with ```\n and ends with ```
     if block.startswith("```\n") and block.endswith("```") and len(block) > 7:
-        return BlockType.CODE
+        return ClassifiedBlock(BlockType.CODE)
 
     # Heading: 1-6 # then space
-    if re.match(r"^#{1,6} ", block):
-        return BlockType.HEADING
+    match = _HEADING.match(block)
+    if match:
+        return ClassifiedBlock(BlockType.HEADING, [block], [match.end()])
 
-    # Quote: every line starts with >
-    if lines and all(line.startswith(">") for line in lines):
-        return BlockType.QUOTE
+    # Quote: every line starts with >. Unordered list: every line starts with "- ".
+    # Ordered list: every line starts with "N. " for N = 1, 2, 3, ...
+    # All three are checked together, stopping as soon as none can match.
+    lines = block.split("\n")
+    quote = block[0] == ">"
+    unordered = block[0] == "-"
+    ordered = block[0] == "1"
+    quote_prefixes = []
+    ordered_prefixes = []
+    for i, line in enumerate(lines):
+        if quote:
+            if line.startswith(">"):
+                quote_prefixes.append(_QUOTE_PREFIX.match(line).end())
+            else:
+                quote = False
+        if unordered and not line.startswith("- "):
+            unordered = False
+        if ordered:
+            item = _ORDERED_ITEM.match(line)
+            if item and int(item.group(1)) == i + 1 and item.group(1)[0] != "0":
+                ordered_prefixes.append(item.end())
+            else:
+                ordered = False
+        if not (quote or unordered or ordered):
+            return ClassifiedBlock(BlockType.PARAGRAPH)
 
-    # Unordered list: every line starts with "- "
-    if lines and all(line.startswith("- ") for line in lines):
-        return BlockType.UNORDERED_LIST
+    if quote:
+        return ClassifiedBlock(BlockType.QUOTE, lines, quote_prefixes)
+    if unordered:
+        return ClassifiedBlock(BlockType.UNORDERED_LIST, lines, [2] * len(lines))
+    return ClassifiedBlock(BlockType.ORDERED_LIST, lines, ordered_prefixes)
 
-    # Ordered list: every line starts with "N. " for N = 1, 2, 3, ...
-    if lines and all(
-        len(line) >= 3 and line.startswith(f"{i + 1}. ") for i, line in enumerate(lines)
-    ):
-        return BlockType.ORDERED_LIST
 
-    return BlockType.PARAGRAPH
+def block_to_block_type(block):
+    """Return the BlockType for a single block of markdown. Assumes block is already stripped."""
+    return classify_block(block).block_type
@@ -0,0 +1,111 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from staging import temporary_file
+
+# Extensions worth precompressing; images and fonts are already compressed.
+COMPRESSIBLE = frozenset((".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".map", ".ico"))
+
+
+def _gz_path(path: Path) -> Path:
+    return path.with_name(path.name + ".gz")
+
+
+def _is_reusable(path: Path, gz: Path, stat: os.stat_result) -> bool:
+    """True if gz was compressed from path as it is now: same mtime, and the gzip trailer records the same size."""
+    try:
+        if gz.stat().st_mtime_ns != stat.st_mtime_ns:
+            return False
+        with gz.open("rb") as f:
+            f.seek(-4, os.SEEK_END)
+            return int.from_bytes(f.read(4), "little") == stat.st_size % (1 << 32)
+    except OSError:
+        return False
+
+
+def gzip_file(path: str | Path, min_size: int = 1024, max_ratio: float = 0.9, level: int = 9) -> str:
+    """
+    Write path.gz next to path, unless path is smaller than min_size bytes or would
+    compress to more than max_ratio of its size (then any old .gz is removed). A .gz
+    left by an earlier run is reused while path keeps its mtime and size.
+    Returns "written", "reused" or "skipped".
+    """
+    path = Path(path)
+    gz = _gz_path(path)
+    stat = path.stat()
+    if stat.st_size < min_size:
+        gz.unlink(missing_ok=True)
+        return "skipped"
+    if _is_reusable(path, gz, stat):
+        return "reused"
+    # mtime=0 keeps the output identical for identical input.
+    data = gzip.compress(path.read_bytes(), compresslevel=level, mtime=0)
+    if len(data) > stat.st_size * max_ratio:
+        gz.unlink(missing_ok=True)
+        return "skipped"
+    # Written beside gz and renamed over it, like every build output (see staging). The
+    # .gz carries its source's mtime, which is what marks it reusable next time.
+    fd, tmp = temporary_file(gz)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.utime(tmp, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(tmp, gz)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return "written"
+
+
+def gzip_tree(
+    root: str | Path, min_size: int = 1024, max_ratio: float = 0.9, level: int = 9, jobs: int = 8
+) -> dict:
+    """
+    Run gzip_file over every compressible file under root on a thread pool (zlib
+    releases the GIL while compressing), and delete .gz siblings whose source is gone.
+    Hidden files such as the build manifest are left alone. Returns a count of each
+    gzip_file outcome plus "removed".
+    """
+    root = Path(root)
+    sources = []
+    orphans = []
+    for path in sorted(root.rglob("*")):
+        if path.name.startswith(".") or not path.is_file():
+            continue
+        if path.suffix == ".gz":
+            source = path.with_suffix("")
+            # Only siblings this stage could have written; other .gz files are content.
+            if source.suffix.lower() in COMPRESSIBLE and not source.is_file():
+                orphans.append(path)
+        elif path.suffix.lower() in COMPRESSIBLE:
+            sources.append(path)
+    counts = {"written": 0, "reused": 0, "skipped": 0, "removed": len(orphans)}
+    for path in orphans:
+        path.unlink()
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for outcome in pool.map(lambda p: gzip_file(p, min_size, max_ratio, level), sources):
+            counts[outcome] += 1
+    return counts
+
+
+def prune_gzip(root: str | Path) -> int:
+    """
+    For builds without the gzip stage: delete .gz siblings under root that no longer
+    match their source (or whose source is gone), so a server never sends a stale
+    precompressed page. Returns the number removed.
+    """
+    removed = 0
+    for gz in Path(root).rglob("*.gz"):
+        source = gz.with_suffix("")
+        if gz.name.startswith(".") or source.suffix.lower() not in COMPRESSIBLE:
+            continue
+        try:
+            stat = source.stat()
+        except FileNotFoundError:
+            stat = None
+        if stat is None or not _is_reusable(source, gz, stat):
+            gz.unlink()
+            removed += 1
+    return removed
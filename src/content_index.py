@@ -0,0 +1,100 @@
+import hashlib
+import json
+from pathlib import Path
+
+from gencontent import decode_markdown
+from markdown_to_html import markdown_to_document
+from staging import write_if_changed
+
+INDEX_VERSION = "1"
+
+
+def index_markdown(markdown: str) -> dict:
+    """
+    The title and the outbound link and image URLs of a page, as they appear in its
+    HTML: URLs in code spans and code blocks are not links.
+    """
+    document = markdown_to_document(markdown)
+    return {"title": document.title, "links": list(document.links), "images": list(document.images)}
+
+
+class ContentIndex:
+    """
+    Site-wide index of the content directory, stored as compact JSON. For every page,
+    keyed by its source path relative to the content directory, it records the output
+    path, title, sha256, size, mtime and outbound links and images, so listings, link
+    checks and sitemaps can look pages up without reading or parsing any markdown.
+    """
+
+    def __init__(self, path: str | Path, pages: dict | None = None):
+        self.path = Path(path)
+        self.pages = pages if pages is not None else {}
+        self._outputs = {entry["output"]: source for source, entry in self.pages.items()}
+
+    @classmethod
+    def load(cls, path: str | Path) -> "ContentIndex":
+        """Load the index from path. A missing, unreadable or outdated index is treated as empty."""
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cls(path)
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            return cls(path)
+        if not isinstance(data.get("pages"), dict):
+            return cls(path)
+        return cls(path, data["pages"])
+
+    def save(self) -> None:
+        data = {"version": INDEX_VERSION, "pages": self.pages}
+        write_if_changed(self.path, [json.dumps(data, separators=(",", ":"), sort_keys=True)])
+
+    def page(self, source: str) -> dict | None:
+        """The entry for a source path relative to the content directory (e.g. "blog/post.md")."""
+        return self.pages.get(source)
+
+    def page_for_output(self, output: str) -> dict | None:
+        """The entry for an output path relative to the output directory (e.g. "blog/post.html")."""
+        source = self._outputs.get(output)
+        return self.pages[source] if source is not None else None
+
+    def update(self, content_dir: str | Path, parsed: dict | None = None) -> tuple:
+        """
+        Bring the index up to date with content_dir. Only files whose mtime or size
+        differ from their entry are read again, and only those not in parsed are parsed:
+        parsed maps a source path (content_dir joined with the relative path, as the
+        build names pages) to the gencontent.page_summary the build already made of it.
+        A summary whose hash no longer matches the file is ignored. Returns the sorted
+        (changed or added, removed) source paths.
+        """
+        parsed = parsed or {}
+        content_path = Path(content_dir)
+        changed = []
+        seen = set()
+        for md_file in sorted(content_path.rglob("*.md")):
+            source = md_file.relative_to(content_path).as_posix()
+            seen.add(source)
+            stat = md_file.stat()
+            entry = self.pages.get(source)
+            if entry is not None and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                continue
+            data = md_file.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            summary = parsed.get(str(md_file))
+            if summary is None or summary["hash"] != digest:
+                summary = index_markdown(decode_markdown(data))
+            entry = {
+                "output": Path(source).with_suffix(".html").as_posix(),
+                "hash": digest,
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+                "title": summary["title"],
+                "links": summary["links"],
+                "images": summary["images"],
+            }
+            self.pages[source] = entry
+            self._outputs[entry["output"]] = source
+            changed.append(source)
+        removed = sorted(set(self.pages) - seen)
+        for source in removed:
+            del self._outputs[self.pages.pop(source)["output"]]
+        return changed, removed
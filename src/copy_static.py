@@ -1,31 +1,115 @@
 import logging
+import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from manifest import hash_file
 
-def copy_directory(src: str, dst: str) -> None:
+
+def _is_current(src: Path, dst: Path, compare: str) -> bool:
+    """True if dst already holds the same file as src."""
+    try:
+        src_stat = src.stat()
+        dst_stat = dst.stat()
+    except FileNotFoundError:
+        return False
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if compare == "hash":
+        return hash_file(src) == hash_file(dst)
+    # copy2 and hardlinks both carry the source mtime over to the destination.
+    return src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+
+
+def _transfer(src: Path, dst: Path, link: bool) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if link:
+        tmp = dst.with_name(dst.name + ".tmp-link")
+        # Left behind by an interrupted sync, it would make os.link fail every time.
+        tmp.unlink(missing_ok=True)
+        try:
+            os.link(src, tmp)
+        except OSError:
+            # Cross-device or unsupported filesystem: fall back to copying.
+            pass
+        else:
+            os.replace(tmp, dst)
+            return
+    # shutil.copy2 already uses the kernel's zero-copy sendfile path on Linux. Copy
+    # beside dst and rename over it: dst may be a hardlink shared with the live site
+    # (see staging), so it must never be written in place.
+    tmp = dst.with_name(dst.name + ".tmp-copy")
+    # A stale temp file may itself be a hardlink into the live site; copy2 would write through it.
+    tmp.unlink(missing_ok=True)
+    shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+
+def sync_file(src: Path, dst: Path, compare: str = "mtime", link: bool = False) -> bool:
+    """Copy (or hardlink) src to dst unless dst already holds the same file. Returns True if it copied."""
+    if dst.is_file() and ((link and os.path.samefile(src, dst)) or _is_current(src, dst, compare)):
+        return False
+    _transfer(src, dst, link)
+    logging.info("Copied: %s -> %s", src, dst)
+    return True
+
+
+def sync_directory(
+    src: str,
+    dst: str,
+    previous: set | None = None,
+    compare: str = "mtime",
+    link: bool = False,
+    jobs: int = 8,
+    names: dict | None = None,
+) -> set:
     """
-    Recursively copy all files and subdirectories from src to dst.
-    Creates destination directories as needed. Logs each file copied.
+    Make dst mirror the files in src without recopying what is already there.
+
+    A file is copied only when it is missing from dst or differs by size and mtime
+    (compare="mtime") or by content hash (compare="hash"). With link=True files are
+    hardlinked instead of copied where the filesystem allows it. Files listed in
+    previous (relative paths from an earlier sync) that no longer exist in src are
+    deleted from dst; nothing else in dst is touched. Copies run on a thread pool.
+    names maps relative paths in src to different relative paths in dst (e.g.
+    fingerprinted asset names); other files keep their own. Returns the relative
+    paths in dst of every file now synced from src.
     """
     src_path = Path(src).resolve()
     dst_path = Path(dst).resolve()
 
     if not src_path.is_dir():
         raise FileNotFoundError(f"Source is not a directory: {src_path}")
+    if compare not in ("mtime", "hash"):
+        raise ValueError(f"Unknown compare mode: {compare}")
+
+    sources = {p.relative_to(src_path).as_posix() for p in src_path.rglob("*") if p.is_file()}
+    names = names or {}
+    targets = {rel: names.get(rel, rel) for rel in sources}
+    files = set(targets.values())
+
+    def sync_one(rel: str) -> None:
+        sync_file(src_path / rel, dst_path / targets[rel], compare, link)
 
     dst_path.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        # list() re-raises the first error from any worker.
+        list(pool.map(sync_one, sorted(sources)))
 
-    for item in src_path.iterdir():
-        dest_item = dst_path / item.name
-        if item.is_file():
-            shutil.copy2(item, dest_item)
-            logging.info("Copied: %s -> %s", item, dest_item)
-        elif item.is_dir():
-            copy_directory(str(item), str(dest_item))
+    for rel in sorted((previous or set()) - files):
+        stale = dst_path / rel
+        if stale.is_file():
+            stale.unlink()
+            logging.info("Removed: %s", stale)
+        parent = stale.parent
+        while parent != dst_path and parent.is_dir() and not any(parent.iterdir()):
+            parent.rmdir()
+            parent = parent.parent
+    return files
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format="%(message)s")
     project_root = Path(__file__).resolve().parent.parent
-    copy_directory(str(project_root / "static"), str(project_root / "docs"))
+    sync_directory(str(project_root / "static"), str(project_root / "docs"))
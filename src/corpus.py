@@ -0,0 +1,117 @@
+"""Synthetic content trees for benchmarking the generator."""
+
+import random
+from pathlib import Path
+
+TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <title> {{ Title }} </title>
+    <link href="/index.css" rel="stylesheet">
+</head>
+<body>
+    <article>
+        {{ Content }}
+    </article>
+</body>
+</html>
+"""
+
+_WORDS = (
+    "the of and to in is was that for on with as by at from his her they this "
+    "elves ring shire river mountain road forest king tower valley sword song"
+).split()
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(count))
+
+
+def _paragraph(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(3, 6)):
+        parts.append(_words(rng, rng.randint(4, 12)))
+        parts.append(rng.choice(("**bold words**", "_italic words_", "`code()`", "", "")))
+    return " ".join(p for p in parts if p) + "."
+
+
+def _link_paragraph(rng: random.Random) -> str:
+    parts = []
+    for i in range(rng.randint(10, 30)):
+        parts.append(_words(rng, rng.randint(1, 4)))
+        if i % 5 == 4:
+            parts.append(f"![{_words(rng, 2)}](/images/img{rng.randint(0, 99)}.png)")
+        else:
+            parts.append(f"[{_words(rng, 2)}](/blog/post{rng.randint(0, 999)})")
+    return " ".join(parts)
+
+
+def _list_block(rng: random.Random) -> str:
+    count = rng.randint(3, 12)
+    if rng.random() < 0.5:
+        return "\n".join(f"- {_paragraph(rng)}" for _ in range(count))
+    return "\n".join(f"{i + 1}. {_paragraph(rng)}" for i in range(count))
+
+
+def _code_block(rng: random.Random) -> str:
+    lines = [f"    {_words(rng, 3).replace(' ', '_')} = {rng.randint(0, 9999)}" for _ in range(rng.randint(5, 25))]
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
+def _quote_block(rng: random.Random) -> str:
+    return "\n".join(f"> {_paragraph(rng)}" for _ in range(rng.randint(1, 4)))
+
+
+# Shape name -> block generators with their relative weights.
+SHAPES = {
+    "mixed": ((_paragraph, 5), (_link_paragraph, 1), (_list_block, 2), (_code_block, 1), (_quote_block, 1)),
+    "links": ((_link_paragraph, 8), (_paragraph, 1)),
+    "lists": ((_list_block, 8), (_paragraph, 1)),
+    "code": ((_code_block, 8), (_paragraph, 1)),
+}
+
+
+def make_document(rng: random.Random, shape: str, target_bytes: int, title: str) -> str:
+    """Return one markdown document of roughly target_bytes built from the given shape's blocks."""
+    generators, weights = zip(*SHAPES[shape])
+    blocks = [f"# {title}"]
+    size = len(blocks[0])
+    while size < target_bytes:
+        if rng.random() < 0.1:
+            blocks.append(f"## {_words(rng, 3)}")
+        blocks.append(rng.choices(generators, weights)[0](rng))
+        size += len(blocks[-1]) + 2
+    return "\n\n".join(blocks) + "\n"
+
+
+def generate_corpus(
+    root: str | Path,
+    shape: str = "mixed",
+    pages: int = 100,
+    page_bytes: int = 4096,
+    huge_pages: int = 0,
+    huge_bytes: int = 2 * 1024 * 1024,
+    seed: int = 0,
+) -> int:
+    """
+    Write a site under root (content/, static/ and template.html) with pages posts of
+    about page_bytes each plus huge_pages posts of about huge_bytes. Returns the total
+    number of markdown bytes written.
+    """
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown corpus shape: {shape}")
+    rng = random.Random(seed)
+    root = Path(root)
+    content = root / "content"
+    (root / "static").mkdir(parents=True, exist_ok=True)
+    (root / "static" / "index.css").write_text("body { margin: 0 }\n", encoding="utf-8")
+    (root / "template.html").write_text(TEMPLATE, encoding="utf-8")
+    total = 0
+    for i in range(pages + huge_pages):
+        size = page_bytes if i < pages else huge_bytes
+        path = content / "blog" / f"post{i:05}" / "index.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        text = make_document(rng, shape, size, f"Post {i}")
+        path.write_text(text, encoding="utf-8")
+        total += len(text.encode("utf-8"))
+    return total
@@ -0,0 +1,34 @@
+class SafeString(str):
+    """
+    A string that is already HTML (e.g. pre-highlighted code or a serialised node) and
+    is inserted without escaping. Operations on it return plain, unsafe str again.
+    """
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return f"SafeString({str.__repr__(self)})"
+
+
+def escape_text(value: str) -> str:
+    """
+    Escape value for use as element content. Most text has nothing to escape, so that
+    is checked first (a few C-level scans, no copy) and the value returned as is.
+    SafeStrings are returned unchanged.
+    """
+    if "&" not in value and "<" not in value and ">" not in value:
+        return value
+    if isinstance(value, SafeString):
+        return value
+    # Chained replace beats a str.translate table several times over here: translate
+    # builds the result one character at a time once a mapping expands to a string.
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def escape_attribute(value: str) -> str:
+    """escape_text for a double-quoted attribute value, where '"' is escaped too."""
+    if '"' not in value and "&" not in value and "<" not in value and ">" not in value:
+        return value
+    if isinstance(value, SafeString):
+        return value
+    return escape_text(value).replace('"', "&quot;")
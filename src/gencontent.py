@@ -1,39 +1,188 @@
+import hashlib
 from pathlib import Path
 
-from markdown_to_html import markdown_to_html_node
+import profiling
+from block_type import BlockType, classify_block
+from escaping import SafeString
+from markdown_blocks import iter_blocks
+from markdown_to_html import Document, markdown_file_to_html_node, markdown_to_document
+from render_cache import RenderCache, cache_key
+from staging import write_if_changed
+from template import load_template
+from urls import assets_digest, basepath_resolver
+
+# Sources bigger than this many bytes are streamed: read, parsed and written one block
+# at a time instead of being loaded whole, so memory use stays flat however big they are.
+stream_threshold = 16 * 1024 * 1024
 
 
 def extract_title(markdown: str) -> str:
     """Extract the h1 heading (line starting with a single #) from markdown. Raises if not found."""
-    lines = markdown.strip().splitlines()
-    for line in lines:
-        stripped = line.strip()
-        # Single # only: "# " then non-# (so "## " is not h1)
-        if stripped.startswith("# ") and (len(stripped) == 2 or stripped[2] != "#"):
-            return stripped[2:].strip()
-    raise ValueError("Markdown must contain exactly one h1 header (a line starting with '# ')")
+    return extract_title_from_lines(markdown.strip().splitlines())
+
+
+def extract_title_from_lines(lines, source: str | None = None) -> str:
+    """
+    extract_title for an iterable of lines; stops reading at the first h1. Lines are
+    read as blocks, as parse_page does, so a "# " line inside a code block is not the
+    title and a streamed page gets the title its parsed form would.
+    """
+    for block in iter_blocks(lines):
+        classified = classify_block(block)
+        # Single # only: the heading's text starts right after "# ".
+        if classified.block_type == BlockType.HEADING and classified.prefixes[0] == 2:
+            return block[2:].split("\n", 1)[0].strip()
+    raise _missing_title(source)
+
+
+def _missing_title(source: str | None) -> ValueError:
+    message = "Markdown must contain exactly one h1 header (a line starting with '# ')"
+    return ValueError(f"{source}: {message}" if source is not None else message)
+
+
+def parse_page(markdown: str, source: str | None = None) -> Document:
+    """
+    Parse markdown into a Document (HTML tree, title and heading outline). This is the
+    expensive part of building a page. Raises ValueError, naming source (the file the
+    markdown came from) if given, when the page has no h1 to take its title from.
+    """
+    document = markdown_to_document(markdown)
+    if document.title is None:
+        raise _missing_title(source)
+    return document
+
+
+def fill_template(title: str, html_node, template_path: str, basepath: str = "/"):
+    """
+    Yield the finished HTML page for an already-parsed page in chunks. Site-absolute
+    href and src URLs in the template and the page are moved under basepath as they
+    are serialised (e.g. for GitHub Pages /repo/).
+    """
+    template = load_template(template_path)
+    return template.iter_render({"Title": title, "Content": html_node}, basepath_resolver(basepath))
+
+
+def page_summary(source: bytes, document: Document) -> dict:
+    """
+    What the content index records about a parsed page (see content_index): the
+    sha256 of its source bytes, its title, and its link and image URLs.
+    """
+    return {
+        "hash": hashlib.sha256(source).hexdigest(),
+        "title": document.title,
+        "links": list(document.links),
+        "images": list(document.images),
+    }
+
+
+def render_page(markdown: str, template_path: str, basepath: str = "/"):
+    """Yield the finished HTML page for markdown in chunks, ready to be written to a file or socket."""
+    document = parse_page(markdown)
+    return fill_template(document.title, document.node, template_path, basepath)
+
+
+def write_page(dest_path: str, chunks) -> bool:
+    """
+    Stream page chunks into dest_path, creating its directory if needed. An existing
+    page with identical content is left alone, mtime included. Returns True if written.
+    """
+    return write_if_changed(dest_path, chunks)
 
 
 def generate_page(
-    from_path: str, template_path: str, dest_path: str, basepath: str = "/"
+    from_path: str,
+    template_path: str,
+    dest_path: str,
+    basepath: str = "/",
+    cache: RenderCache | None = None,
 ) -> None:
-    """Read markdown and template, convert markdown to HTML, fill template, write to dest_path."""
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    """
+    Read markdown, convert it to HTML, fill the (cached, compiled) template and stream the page to dest_path.
+    With a render cache, a page already rendered from the same inputs is copied from the
+    cache instead, and a newly rendered page is added to it.
+    """
+    generate_page_targets(from_path, template_path, ((dest_path, basepath),), cache)
+
+
+def generate_page_targets(
+    from_path: str, template_path: str, targets, cache: RenderCache | None = None
+) -> dict | None:
+    """
+    generate_page for several (dest_path, basepath) targets at once: the markdown is
+    read and parsed once, and the tree serialised once per target. Returns the
+    page_summary of the page if it was parsed (not taken from the cache or streamed).
+    """
+    dests = ", ".join(dest_path for dest_path, _ in targets)
+    print(f"Generating page from {from_path} to {dests} using {template_path}")
+
+    if profiling.enabled():
+        return _generate_page_profiled(from_path, template_path, targets, cache)
+    if Path(from_path).stat().st_size > stream_threshold:
+        # A streamed tree can only be serialised once, so each target streams it again.
+        for dest_path, basepath in targets:
+            generate_streamed_page(from_path, template_path, dest_path, basepath)
+        return None
+    source = Path(from_path).read_bytes()
+    todo = [(target, None) for target in targets]
+    if cache is not None:
+        keys = page_cache_keys(source, template_path, [basepath for _, basepath in targets])
+        todo = [(target, key) for target, key in zip(targets, keys) if not cache.fetch(key, target[0])]
+        if not todo:
+            return None
+    document = parse_page(decode_markdown(source), from_path)
+    for (dest_path, basepath), key in todo:
+        write_page(dest_path, fill_template(document.title, document.node, template_path, basepath))
+        if cache is not None:
+            cache.store(key, dest_path)
+    return page_summary(source, document)
+
+
+def generate_streamed_page(from_path: str, template_path: str, dest_path: str, basepath: str = "/") -> None:
+    """generate_page for a source too big to load: it is read, parsed and written one block at a time."""
+    with open(from_path, encoding="utf-8") as f:
+        title = extract_title_from_lines(f, from_path)
+    chunks = fill_template(title, markdown_file_to_html_node(from_path), template_path, basepath)
+    write_page(dest_path, chunks)
+
 
-    markdown = Path(from_path).read_text(encoding="utf-8")
-    template = Path(template_path).read_text(encoding="utf-8")
+def decode_markdown(source: bytes) -> str:
+    """Decode markdown file bytes with the same newline translation as reading in text mode."""
+    return source.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
 
-    html_node = markdown_to_html_node(markdown)
-    content_html = html_node.to_html()
-    title = extract_title(markdown)
 
-    html_page = template.replace("{{ Title }}", title).replace("{{ Content }}", content_html)
+def page_cache_keys(source: bytes, template_path: str, basepaths) -> list:
+    """The render cache key of the page built from source bytes with this template, for each basepath."""
+    source_hash = hashlib.sha256(source).hexdigest()
+    template_hash = load_template(template_path).digest
+    assets = assets_digest()
+    return [cache_key(source_hash, template_hash, basepath, assets) for basepath in basepaths]
 
-    # Rewrite absolute paths so they work under a base path (e.g. GitHub Pages /repo/)
-    if basepath != "/":
-        html_page = html_page.replace('href="/', f'href="{basepath}')
-        html_page = html_page.replace('src="/', f'src="{basepath}')
 
-    dest = Path(dest_path)
-    dest.parent.mkdir(parents=True, exist_ok=True)
-    dest.write_text(html_page, encoding="utf-8")
+def _generate_page_profiled(
+    from_path: str, template_path: str, targets, cache: RenderCache | None
+) -> dict | None:
+    """generate_page_targets with every stage run to completion on its own, so each can be timed."""
+    with profiling.page(from_path):
+        with profiling.stage("read"):
+            source = Path(from_path).read_bytes()
+        todo = [(target, None) for target in targets]
+        if cache is not None:
+            with profiling.stage("cache"):
+                keys = page_cache_keys(source, template_path, [basepath for _, basepath in targets])
+                todo = [(target, key) for target, key in zip(targets, keys) if not cache.fetch(key, target[0])]
+            if not todo:
+                return None
+        document = parse_page(decode_markdown(source), from_path)
+        template = load_template(template_path)
+        for (dest_path, basepath), key in todo:
+            resolve_url = basepath_resolver(basepath)
+            with profiling.stage("serialise"):
+                content = SafeString(document.node.to_html(resolve_url))
+            with profiling.stage("template"):
+                chunks = list(template.iter_render({"Title": document.title, "Content": content}, resolve_url))
+            with profiling.stage("write"):
+                write_page(dest_path, chunks)
+            if cache is not None:
+                with profiling.stage("cache"):
+                    cache.store(key, dest_path)
+    return page_summary(source, document)
@@ -1,4 +1,15 @@
+import sys
+
+from escaping import escape_attribute, escape_text
+from urls import URL_ATTRIBUTES
+
+
 class HtmlNode:
+    # A page can hold hundreds of thousands of nodes; slots keep each one free of a
+    # per-instance __dict__, and tags are interned. The children slot stays here, so
+    # HtmlNode takes children like its subclasses; a leaf's is always None.
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
         self,
         tag: str | None = None,
@@ -6,48 +17,99 @@ class HtmlNode:
         children: list | None = None,
         props: dict | None = None,
     ):
-        self.tag = tag
+        self.tag = sys.intern(tag) if tag is not None else None
         self.value = value
         self.children = children
         self.props = props
 
-    def to_html(self) -> str:
+    def to_html(self, resolve_url=None) -> str:
         raise NotImplementedError("Child classes must implement to_html()")
 
-    def props_to_html(self) -> str:
+    def iter_html(self, resolve_url=None):
+        """Yield the node's HTML in chunks, without building the whole string."""
+        raise NotImplementedError("Child classes must implement iter_html()")
+
+    def write_html(self, stream, resolve_url=None) -> None:
+        """Write the node's HTML to a text stream chunk by chunk."""
+        stream.writelines(self.iter_html(resolve_url))
+
+    def props_to_html(self, resolve_url=None) -> str:
+        """
+        Serialise props as attributes, with values escaped. resolve_url, if given, maps
+        href and src values (see urls.basepath_resolver); every serialising method passes
+        it down to here.
+        """
         if self.props is None or len(self.props) == 0:
             return ""
-        return "".join(f' {k}="{v}"' for k, v in self.props.items())
+        parts = []
+        for k, v in self.props.items():
+            if not isinstance(v, str):
+                # e.g. {"width": 100}, which f-strings always accepted.
+                v = str(v)
+            if resolve_url is not None and k in URL_ATTRIBUTES:
+                v = resolve_url(v)
+            # escape_attribute's fast path, inlined: this runs for every attribute.
+            if '"' in v or "&" in v or "<" in v or ">" in v:
+                v = escape_attribute(v)
+            parts.append(f' {k}="{v}"')
+        return "".join(parts)
 
 
     def __repr__(self) -> str:
         return f"HtmlNode(tag={self.tag!r}, value={self.value!r}, children={self.children!r}, props={self.props!r})"
 
 class LeafNode(HtmlNode):
+    __slots__ = ()
+
     def __init__(self, tag: str | None, value: str, props: dict | None = None):
         if value is None:
             raise ValueError("LeafNode requires a value")
         super().__init__(tag=tag, value=value, children=None, props=props)
 
-    def to_html(self) -> str:
+    def to_html(self, resolve_url=None) -> str:
         if self.value is None:
             raise ValueError("LeafNode requires a value")
+        # The value is text and is escaped, unless it is a SafeString (see escaping).
+        # escape_text's fast path is inlined: this runs for every leaf of every page.
+        value = self.value
+        if not isinstance(value, str):
+            value = str(value)
+        if "&" in value or "<" in value or ">" in value:
+            value = escape_text(value)
         if self.tag is None:
-            return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            return value
+        if not self.props:
+            return f"<{self.tag}>{value}</{self.tag}>"
+        return f"<{self.tag}{self.props_to_html(resolve_url)}>{value}</{self.tag}>"
+
+    def iter_html(self, resolve_url=None):
+        yield self.to_html(resolve_url)
 
     def __repr__(self) -> str:
         return f"LeafNode(tag={self.tag!r}, value={self.value!r}, props={self.props!r})"
 
 class ParentNode(HtmlNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, children: list, props: dict | None = None):
         super().__init__(tag=tag, value=None, children=children, props=props)
 
-    def to_html(self) -> str:
+    def to_html(self, resolve_url=None) -> str:
+        if self.tag is None:
+            raise ValueError("ParentNode requires a tag")
+        if self.children is None:
+            raise ValueError("ParentNode requires children")
+        inner = "".join(child.to_html(resolve_url) for child in self.children)
+        return f"<{self.tag}{self.props_to_html(resolve_url)}>{inner}</{self.tag}>"
+
+    def iter_html(self, resolve_url=None):
+        # Each chunk is a whole tag or leaf, so attributes are never split across chunks.
         if self.tag is None:
             raise ValueError("ParentNode requires a tag")
         if self.children is None:
             raise ValueError("ParentNode requires children")
-        inner = "".join(child.to_html() for child in self.children)
-        return f"<{self.tag}{self.props_to_html()}>{inner}</{self.tag}>"
+        yield f"<{self.tag}{self.props_to_html(resolve_url)}>"
+        for child in self.children:
+            yield from child.iter_html(resolve_url)
+        yield f"</{self.tag}>"
 
@@ -5,69 +5,79 @@ from textnode import TextNode, TextType
 
 def extract_markdown_images(text):
     """Extract markdown images ![alt](url) from text. Returns list of (alt_text, url) tuples."""
-    pattern = r"!\[(.*?)\]\((.*?)\)"
-    return re.findall(pattern, text)
+    return [(alt, url) for _, _, alt, url in _bracketed(text, image=True)]
 
 
 def extract_markdown_links(text):
     """Extract markdown links [anchor](url) from text (not images). Returns list of (anchor_text, url) tuples."""
-    pattern = r"(?<!!)\[(.*?)\]\((.*?)\)"
-    return re.findall(pattern, text)
+    return [(anchor, url) for _, _, anchor, url in _bracketed(text, image=False)]
 
 
 def split_nodes_image(old_nodes):
     """Split TEXT nodes by markdown images ![alt](url). Non-TEXT nodes are passed through."""
-    new_nodes = []
-    for node in old_nodes:
-        if node.text_type != TextType.TEXT:
-            new_nodes.append(node)
-            continue
-        images = extract_markdown_images(node.text)
-        if not images:
-            new_nodes.append(node)
-            continue
-        remaining = node.text
-        for alt, url in images:
-            delimiter = f"![{alt}]({url})"
-            sections = remaining.split(delimiter, 1)
-            before = sections[0]
-            after = sections[1] if len(sections) > 1 else ""
-            if before:
-                new_nodes.append(TextNode(before, TextType.TEXT))
-            new_nodes.append(TextNode(alt, TextType.IMAGE, url))
-            remaining = after
-        if remaining:
-            new_nodes.append(TextNode(remaining, TextType.TEXT))
-    return new_nodes
+    return _split_nodes_bracketed(old_nodes, image=True)
 
 
 def split_nodes_link(old_nodes):
     """Split TEXT nodes by markdown links [anchor](url). Non-TEXT nodes are passed through."""
+    return _split_nodes_bracketed(old_nodes, image=False)
+
+
+def _bracketed(text, image):
+    """
+    Yield (start, end, label, url) for each ![label](url) (or [label](url) not preceded
+    by "!") in text, matching like the pattern r"\[(.*?)\]\((.*?)\)": the label runs to
+    the first "](" and the url to the next ")", both on the opener's line. Unlike that
+    pattern, which rescans the rest of the line from every unmatched "[", this is linear
+    in len(text): each search moves forward only (see _Finder).
+    """
+    opener = "![" if image else "["
+    close_bracket = _Finder(text, "](")
+    close_paren = _Finder(text, ")")
+    # The first "![" still ahead and, separately, the "](" and ")" that would close it.
+    image_open = _Finder(text, "![")
+    image_bracket = _Finder(text, "](")
+    image_paren = _Finder(text, ")")
+    newline = _Finder(text, "\n")
+    pos = 0
+    while (i := text.find(opener, pos)) != -1:
+        pos = i + len(opener)
+        if not image and i > 0 and text[i - 1] == "!":
+            continue
+        eol = newline.find(pos)
+        j = close_bracket.find(pos)
+        k = close_paren.find(j + 2) if j != -1 else -1
+        if k == -1 or (eol != -1 and k > eol):
+            continue
+        yield i, k + 1, text[pos:j], text[j + 2 : k]
+        pos = k + 1
+
+
+def _split_nodes_bracketed(old_nodes, image):
+    text_type = TextType.IMAGE if image else TextType.LINK
     new_nodes = []
     for node in old_nodes:
         if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
-        links = extract_markdown_links(node.text)
-        if not links:
+        pos = 0
+        for start, end, label, url in _bracketed(node.text, image):
+            if start > pos:
+                new_nodes.append(TextNode(node.text[pos:start], TextType.TEXT))
+            new_nodes.append(TextNode(label, text_type, url))
+            pos = end
+        if pos == 0:
             new_nodes.append(node)
-            continue
-        remaining = node.text
-        for anchor, url in links:
-            delimiter = f"[{anchor}]({url})"
-            sections = remaining.split(delimiter, 1)
-            before = sections[0]
-            after = sections[1] if len(sections) > 1 else ""
-            if before:
-                new_nodes.append(TextNode(before, TextType.TEXT))
-            new_nodes.append(TextNode(anchor, TextType.LINK, url))
-            remaining = after
-        if remaining:
-            new_nodes.append(TextNode(remaining, TextType.TEXT))
+        elif pos < len(node.text):
+            new_nodes.append(TextNode(node.text[pos:], TextType.TEXT))
     return new_nodes
 
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
+    """
+    Split TEXT nodes on delimiter, giving the text between each pair text_type. A final
+    delimiter without a partner is kept as literal text.
+    """
     new_nodes = []
     for node in old_nodes:
         if node.text_type != TextType.TEXT:
@@ -75,7 +85,7 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
             continue
         parts = node.text.split(delimiter)
         if len(parts) % 2 == 0:
-            raise ValueError(f"Invalid markdown: no matching closing delimiter '{delimiter}'")
+            parts[-2:] = [parts[-2] + delimiter + parts[-1]]
         split_result = []
         for i, part in enumerate(parts):
             if part == "":
@@ -88,12 +98,133 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
     return new_nodes
 
 
+# Every character that can start an inline construct. Everything between two
+# matches is plain text and is skipped over without looking at it.
+_INLINE_SPECIAL = re.compile(r"!\[|\[|\*\*|_|`")
+
+_EMPHASIS = {"**": TextType.BOLD, "_": TextType.ITALIC}
+
+
+class _Finder:
+    """
+    Next occurrence of needle at or after a position, for positions that only ever
+    increase. Each part of the text is searched at most once, so a run of failed
+    lookups (e.g. thousands of "[" with no "](") stays linear instead of quadratic.
+    """
+
+    def __init__(self, text: str, needle: str):
+        self.text = text
+        self.needle = needle
+        self.pos = None
+
+    def find(self, start: int) -> int:
+        if self.pos is None or (self.pos != -1 and self.pos < start):
+            self.pos = self.text.find(self.needle, start)
+        return self.pos
+
+
+def _close_emphasis(tokens, start, text_type):
+    """Replace tokens[start:] (an opener and what followed it) with emphasised nodes."""
+    span = tokens[start + 1 :]
+    del tokens[start:]
+    run = []
+    for token in span:
+        if isinstance(token, str):
+            run.append(token)
+            continue
+        if run:
+            tokens.append(TextNode("".join(run), text_type))
+            run = []
+        tokens.append(token)
+    if run:
+        tokens.append(TextNode("".join(run), text_type))
+
+
 def text_to_textnodes(text):
-    """Convert raw markdown text into a list of TextNodes (TEXT, BOLD, ITALIC, CODE, IMAGE, LINK)."""
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    """
+    Convert raw markdown text into a list of TextNodes (TEXT, BOLD, ITALIC, CODE, IMAGE, LINK)
+    in a single left-to-right scan.
+
+    Images, links and `code` spans are emitted as soon as they are recognised; their
+    contents are kept verbatim. ** and _ are matched with a delimiter stack: a closer
+    pairs with the nearest open delimiter of the same kind, and openers left between the
+    two become literal text. Emphasis around an image, link or code span is split so the
+    inner node keeps its own type.
+
+    An image takes priority over a link whose label it would fall in, as when images
+    were split out before links. Unmatched delimiters and brackets are literal text,
+    so any input is accepted. The
+    scan is linear in len(text) whatever the input: every search only moves forward,
+    and the delimiter stack never holds more than one opener of each kind.
+    """
+    tokens = []  # literal str pieces and finished TextNodes
+    stack = []  # (index in tokens, delimiter) of open emphasis
+    close_bracket = _Finder(text, "](")
+    close_paren = _Finder(text, ")")
+    # The first "![" still ahead and, separately, the "](" and ")" that would close it.
+    image_open = _Finder(text, "![")
+    image_bracket = _Finder(text, "](")
+    image_paren = _Finder(text, ")")
+    backtick = _Finder(text, "`")
+    pos = 0
+    while True:
+        match = _INLINE_SPECIAL.search(text, pos)
+        if match is None:
+            if pos < len(text):
+                tokens.append(text[pos:])
+            break
+        i = match.start()
+        if i > pos:
+            tokens.append(text[pos:i])
+        marker = match.group()
+        pos = match.end()
+
+        if marker == "`":
+            end = backtick.find(pos)
+            if end == -1:
+                tokens.append(marker)
+                continue
+            if end > pos:
+                tokens.append(TextNode(text[pos:end], TextType.CODE))
+            pos = end + 1
+        elif marker in _EMPHASIS:
+            for depth in range(len(stack) - 1, -1, -1):
+                if stack[depth][1] == marker:
+                    _close_emphasis(tokens, stack[depth][0], _EMPHASIS[marker])
+                    del stack[depth:]
+                    break
+            else:
+                stack.append((len(tokens), marker))
+                tokens.append(marker)
+        else:
+            j = close_bracket.find(pos)
+            k = close_paren.find(j + 2) if j != -1 else -1
+            if k != -1 and marker == "[":
+                # Images take priority: a link that an image starts inside of (in its label
+                # or its URL) is not a link, so "[![logo](/logo.png)](/)" is "[", an image,
+                # "](/)". If the first "![" ahead can't close, no later one can either.
+                p = image_open.find(pos)
+                if p != -1 and p < k:
+                    q = image_bracket.find(p + 2)
+                    if q != -1 and image_paren.find(q + 2) != -1:
+                        k = -1
+            if k == -1:
+                tokens.append(marker)
+                continue
+            text_type = TextType.IMAGE if marker == "![" else TextType.LINK
+            tokens.append(TextNode(text[pos:j], text_type, text[j + 2 : k]))
+            pos = k + 1
+
+    nodes = []
+    run = []
+    for token in tokens:
+        if isinstance(token, str):
+            run.append(token)
+            continue
+        if run:
+            nodes.append(TextNode("".join(run), TextType.TEXT))
+            run = []
+        nodes.append(token)
+    if run:
+        nodes.append(TextNode("".join(run), TextType.TEXT))
     return nodes
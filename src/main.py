@@ -1,15 +1,209 @@
-import os
-import shutil
-import sys
+import argparse
+import contextlib
+import cProfile
+import functools
+import io
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-from copy_static import copy_directory
-from gencontent import generate_page
+import profiling
+import staging
+from assets import ASSET_MANIFEST, asset_urls, fingerprint_assets, write_asset_manifest
+from compress import gzip_tree, prune_gzip
+from content_index import ContentIndex
+from copy_static import sync_directory
+from gencontent import generate_page_targets
+from markdown_to_html import configure_inline_cache, inline_cache_info
+from manifest import BuildManifest, hash_file, page_fingerprint
+from pipeline import Pipeline
+from render_cache import RenderCache
+from template import load_template
+from urls import assets, assets_digest, configure_assets
+from watch import SiteWatcher
 
 dir_path_static = "./static"
 dir_path_docs = "./docs"
 dir_path_content = "./content"
 template_path = "./template.html"
+content_index_path = "./.content-index.json"
+
+# Pages are handed to worker processes in batches of roughly this many source
+# bytes, so that a tree of many small posts doesn't pay one round trip per page.
+batch_bytes = 256 * 1024
+
+
+def _generate_batch(
+    batch: list,
+    profile: bool = False,
+    inline_cache: int | None = None,
+    render_cache: RenderCache | None = None,
+    asset_urls: dict | None = None,
+) -> tuple:
+    """
+    Worker entry point: generate each (from_path, template_path, targets) page.
+    Returns the captured log, the worker's profiling records (when profiling), the
+    inline cache (hits, misses), the render cache (hits, misses) and the page_summary
+    of each page parsed, by from_path, for this batch.
+    """
+    if profile:
+        profiling.enable()
+    if inline_cache is not None and inline_cache_info().maxsize != inline_cache:
+        configure_inline_cache(inline_cache)
+    if asset_urls is not None and assets() != asset_urls:
+        configure_assets(asset_urls)
+    before = inline_cache_info()
+    render_before = (render_cache.hits, render_cache.misses) if render_cache is not None else (0, 0)
+    log = io.StringIO()
+    parsed = {}
+    with contextlib.redirect_stdout(log):
+        for args in batch:
+            summary = generate_page_targets(*args, cache=render_cache)
+            if summary is not None:
+                parsed[args[0]] = summary
+    after = inline_cache_info()
+    cache_stats = (after.hits - before.hits, after.misses - before.misses)
+    render_stats = (0, 0)
+    if render_cache is not None:
+        render_stats = (render_cache.hits - render_before[0], render_cache.misses - render_before[1])
+    return log.getvalue(), profiling.take() if profile else {}, cache_stats, render_stats, parsed
+
+
+def _batch_pages(pages: list, jobs: int) -> list:
+    """Group page argument tuples into batches of about batch_bytes of markdown, keeping at least one batch per job."""
+    sizes = [Path(args[0]).stat().st_size for args in pages]
+    limit = max(1, min(batch_bytes, sum(sizes) // jobs))
+    batches = []
+    current = []
+    size = 0
+    for args, page_size in zip(pages, sizes):
+        current.append(args)
+        size += page_size
+        if size >= limit:
+            batches.append(current)
+            current = []
+            size = 0
+    if current:
+        batches.append(current)
+    return batches
+
+
+def generate_pages(
+    pages: list, jobs: int = 1, render_cache: RenderCache | None = None, parsed: dict | None = None
+) -> tuple:
+    """
+    Generate every (from_path, template_path, targets) page, where targets holds the
+    (dest_path, basepath) outputs rendered from one parse of from_path. With jobs > 1
+    the pages are spread over a process pool; log lines are printed in page order
+    regardless of which worker finished first. Returns the inline cache (hits, misses)
+    summed over every process; render cache hits and misses from every process are
+    added to render_cache's counters. If parsed is given, the page_summary of every
+    page that was parsed is added to it, keyed by from_path.
+    """
+    if parsed is None:
+        parsed = {}
+    if jobs <= 1 or len(pages) <= 1:
+        before = inline_cache_info()
+        for args in pages:
+            summary = generate_page_targets(*args, cache=render_cache)
+            if summary is not None:
+                parsed[args[0]] = summary
+        after = inline_cache_info()
+        return after.hits - before.hits, after.misses - before.misses
+    batches = _batch_pages(pages, jobs)
+    worker = functools.partial(
+        _generate_batch,
+        profile=profiling.enabled(),
+        inline_cache=inline_cache_info().maxsize,
+        render_cache=render_cache,
+        asset_urls=assets(),
+    )
+    hits = misses = 0
+    with ProcessPoolExecutor(max_workers=min(jobs, len(batches))) as pool:
+        for log, records, (batch_hits, batch_misses), render_stats, batch_parsed in pool.map(worker, batches):
+            print(log, end="")
+            profiling.merge(records)
+            parsed.update(batch_parsed)
+            hits += batch_hits
+            misses += batch_misses
+            if render_cache is not None:
+                render_cache.hits += render_stats[0]
+                render_cache.misses += render_stats[1]
+    return hits, misses
+
+
+def _discover_pages(content_path: Path, template_path: str, targets: list, outputs: list, planned: dict):
+    """
+    Yield the (from_path, template_path, page_targets) pages that need building, where
+    page_targets are the (dest_path, basepath) outputs that are out of date; targets
+    are (dest_dir_path, basepath, manifest or None) triples. Every output path is added
+    to its target's set in outputs, and planned maps each yielded dest_path to its
+    (target index, fingerprint or None).
+    """
+    # The compiled template's digest covers its layouts and partials too.
+    with_manifest = any(manifest is not None for _, _, manifest in targets)
+    template_hash = load_template(template_path).digest if with_manifest else None
+    asset_hash = assets_digest()
+    for md_file in sorted(content_path.rglob("*.md")):
+        html_rel = md_file.relative_to(content_path).with_suffix(".html")
+        source_hash = hash_file(md_file) if with_manifest else None
+        page_targets = []
+        for index, (dest_dir_path, basepath, manifest) in enumerate(targets):
+            dest = Path(dest_dir_path) / html_rel
+            outputs[index].add(dest)
+            fingerprint = None
+            if manifest is not None:
+                fingerprint = page_fingerprint(source_hash, template_hash, basepath, asset_hash)
+                if manifest.is_fresh(dest, fingerprint):
+                    continue
+            planned[str(dest)] = (index, fingerprint)
+            page_targets.append((str(dest), basepath))
+        if page_targets:
+            yield (str(md_file), template_path, tuple(page_targets))
+
+
+def generate_targets(
+    dir_path_content: str,
+    template_path: str,
+    targets: list,
+    jobs: int = 1,
+    render_cache: RenderCache | None = None,
+    pipeline: Pipeline | None = None,
+    parsed: dict | None = None,
+) -> list:
+    """
+    generate_pages_recursive for several (dest_dir_path, basepath, manifest or None)
+    targets at once. Each page is read and parsed once and serialised once per target
+    that needs it. Returns the list of pages generated for each target. The summaries
+    of the pages parsed are added to parsed, as in generate_pages.
+    """
+    outputs = [set() for _ in targets]
+    planned = {}
+    pages = _discover_pages(Path(dir_path_content), template_path, targets, outputs, planned)
+    if pipeline is not None:
+        pages = pipeline.build(pages)
+        hits, misses = pipeline.inline_hits, pipeline.inline_misses
+        render_cache = pipeline.render_cache
+        if parsed is not None:
+            parsed.update(pipeline.parsed)
+    else:
+        pages = list(pages)
+        hits, misses = generate_pages(pages, jobs, render_cache, parsed)
+    if hits or misses:
+        print(f"Inline cache: {hits} hit(s), {misses} miss(es)")
+    if render_cache is not None and (render_cache.hits or render_cache.misses):
+        print(f"Render cache: {render_cache.hits} hit(s), {render_cache.misses} miss(es)")
+    generated = [[] for _ in targets]
+    for _, _, page_targets in pages:
+        for dest, _ in page_targets:
+            index, fingerprint = planned[dest]
+            generated[index].append(Path(dest))
+            if fingerprint is not None:
+                targets[index][2].record(dest, fingerprint)
+    for (_, _, manifest), target_outputs in zip(targets, outputs):
+        if manifest is not None:
+            for removed in manifest.remove_stale(target_outputs):
+                print(f"Removed stale page {removed}")
+    return generated
 
 
 def generate_pages_recursive(
@@ -17,35 +211,263 @@ def generate_pages_recursive(
     template_path: str,
     dest_dir_path: str,
     basepath: str,
-) -> None:
-    """Crawl the content directory; for each markdown file, generate an .html file using the template and write it to the destination directory in the same directory structure."""
-    content_path = Path(dir_path_content)
-    dest_path = Path(dest_dir_path)
-    for md_file in content_path.rglob("*.md"):
-        rel = md_file.relative_to(content_path)
-        html_rel = rel.with_suffix(".html")
-        generate_page(
-            str(md_file),
-            template_path,
-            str(dest_path / html_rel),
-            basepath,
-        )
+    manifest: BuildManifest | None = None,
+    jobs: int = 1,
+    render_cache: RenderCache | None = None,
+    pipeline: Pipeline | None = None,
+) -> list:
+    """
+    Crawl the content directory; for each markdown file, generate an .html file using the template and write it to the destination directory in the same directory structure.
+    With a manifest, pages whose inputs are unchanged since the last build are skipped and
+    pages whose source was deleted are removed. jobs > 1 generates pages in parallel.
+    Pages that do need writing are taken from render_cache when it has them. With a
+    pipeline, pages are built by it (with its own jobs and render cache) instead.
+    Returns the list of pages generated.
+    """
+    targets = [(dest_dir_path, basepath, manifest)]
+    return generate_targets(dir_path_content, template_path, targets, jobs, render_cache, pipeline)[0]
 
 
-def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
+def _target(value: str) -> tuple:
+    basepath, sep, outdir = value.partition(":")
+    if not sep or not basepath.startswith("/") or not outdir:
+        raise argparse.ArgumentTypeError(f"expected BASEPATH:OUTDIR, e.g. /preview/:./preview, got {value!r}")
+    return basepath, outdir
 
-    print("Deleting docs directory...")
-    if os.path.exists(dir_path_docs):
-        shutil.rmtree(dir_path_docs)
 
-    print("Copying static files to docs directory...")
-    copy_directory(dir_path_static, dir_path_docs)
-
-    print("Generating pages...")
-    generate_pages_recursive(
-        dir_path_content, template_path, dir_path_docs, basepath
+def parse_args(argv: list | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the static site into ./docs.")
+    parser.add_argument("basepath", nargs="?", help="URL prefix the site is served under (default /)")
+    parser.add_argument(
+        "--target",
+        dest="targets",
+        action="append",
+        type=_target,
+        metavar="BASEPATH:OUTDIR",
+        help="build for basepath into outdir; repeat to build several targets from one parse of each page "
+        "(replaces the positional basepath and ./docs)",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1, help="number of worker processes used to generate pages"
+    )
+    parser.add_argument(
+        "--static-compare",
+        choices=("mtime", "hash"),
+        default="mtime",
+        help="how to tell whether a static file changed: size and mtime, or content hash",
+    )
+    parser.add_argument(
+        "--hardlink", action="store_true", help="hardlink static files into docs instead of copying"
+    )
+    parser.add_argument(
+        "--inline-cache",
+        type=int,
+        default=4096,
+        metavar="N",
+        help="number of converted inline fragments memoised per process (0 disables the cache)",
+    )
+    parser.add_argument(
+        "--render-cache",
+        default=".render-cache",
+        metavar="DIR",
+        help="directory of rendered pages reused across builds and machines (default .render-cache)",
+    )
+    parser.add_argument(
+        "--render-cache-size",
+        type=int,
+        default=256,
+        metavar="MB",
+        help="evict least recently used rendered pages beyond this size (0 disables the render cache)",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="overlap reading and writing files with rendering using an asyncio pipeline (ignored with --profile)",
+    )
+    parser.add_argument(
+        "--io-workers", type=int, default=8, help="threads doing file I/O in --pipeline mode"
     )
+    parser.add_argument(
+        "--queue-depth",
+        type=int,
+        default=16,
+        help="pages buffered between each pair of stages in --pipeline mode",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="publish css, js and image assets under content-hashed names (e.g. index.3f2a9c1b.css) "
+        "so they can be cached forever, and point every page's references at them; files a stylesheet "
+        "refers to keep their names",
+    )
+    parser.add_argument(
+        "--gzip", action="store_true", help="write precompressed .gz siblings of compressible outputs"
+    )
+    parser.add_argument(
+        "--gzip-min-size", type=int, default=1024, metavar="BYTES", help="don't compress files smaller than this"
+    )
+    parser.add_argument(
+        "--gzip-max-ratio",
+        type=float,
+        default=0.9,
+        metavar="RATIO",
+        help="drop the .gz when it is bigger than this fraction of the original",
+    )
+    parser.add_argument(
+        "--watch", action="store_true", help="after building, rebuild whatever changes until interrupted"
+    )
+    parser.add_argument(
+        "--watch-interval", type=float, default=0.5, help="seconds between checks for changes in --watch mode"
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="build-profile.json",
+        metavar="REPORT",
+        help="record per-page, per-stage timings and write them to REPORT (default build-profile.json)",
+    )
+    parser.add_argument(
+        "--profile-top", type=int, default=10, help="number of slowest pages listed after a --profile build"
+    )
+    parser.add_argument(
+        "--cprofile", metavar="FILE", help="also dump cProfile stats for the main process to FILE"
+    )
+    args = parser.parse_args(argv)
+    if args.targets and args.basepath is not None:
+        parser.error("a basepath can't be combined with --target; give it in BASEPATH:OUTDIR instead")
+    if args.basepath is None:
+        args.basepath = "/"
+    outdirs = {}
+    for _, outdir in args.targets or []:
+        # Two targets staged and swapped into one directory would overwrite each other.
+        resolved = Path(outdir).resolve()
+        if resolved in outdirs:
+            parser.error(f"--target {outdir} is the same directory as --target {outdirs[resolved]}")
+        outdirs[resolved] = outdir
+    if args.watch and args.fingerprint:
+        # The watcher syncs an edited asset under its own name; the pages would keep
+        # pointing at the old fingerprinted copy.
+        parser.error("--watch can't be combined with --fingerprint")
+    return args
+
+
+def main(argv: list | None = None):
+    args = parse_args(argv)
+
+    if args.profile:
+        profiling.enable()
+    if args.inline_cache != inline_cache_info().maxsize:
+        configure_inline_cache(args.inline_cache)
+    profiler = cProfile.Profile() if args.cprofile else None
+    if profiler is not None:
+        profiler.enable()
+
+    render_cache = None
+    if args.render_cache_size > 0:
+        render_cache = RenderCache(args.render_cache, args.render_cache_size * 1024 * 1024)
+
+    pipeline = None
+    if args.pipeline and not args.profile:
+        pipeline = Pipeline(args.jobs, args.io_workers, args.queue_depth, render_cache)
+
+    targets = args.targets or [(args.basepath, dir_path_docs)]
+    # Build into a hardlinked clone of each output directory and swap them in at the
+    # end, so a served site is never half built; files whose bytes don't change keep
+    # their mtime.
+    # With --fingerprint, static assets are published under content-hashed names and
+    # every URL resolver maps references to them (see urls.configure_assets).
+    names = fingerprint_assets(dir_path_static) if args.fingerprint else {}
+    configure_assets(asset_urls(names))
+    staged = [staging.begin(outdir) for _, outdir in targets]
+    try:
+        manifests = [BuildManifest.load(path) for path in staged]
+
+        for (_, outdir), path, manifest in zip(targets, staged, manifests):
+            print(f"Syncing static files to {outdir}...")
+            with profiling.page("<static>"), profiling.stage("sync"):
+                synced = sync_directory(
+                    dir_path_static,
+                    path,
+                    set(manifest.static),
+                    compare=args.static_compare,
+                    link=args.hardlink,
+                    names=names,
+                )
+            manifest.static = sorted(synced)
+            if names:
+                write_asset_manifest(path, names)
+            else:
+                (path / ASSET_MANIFEST).unlink(missing_ok=True)
+
+        print("Generating pages...")
+        # Source path -> page_summary of every page parsed, so the index needn't parse it again.
+        parsed = {}
+        generated = generate_targets(
+            dir_path_content,
+            template_path,
+            [(path, basepath, manifest) for (basepath, _), path, manifest in zip(targets, staged, manifests)],
+            args.jobs,
+            render_cache,
+            pipeline,
+            parsed,
+        )
+        for (_, outdir), path in zip(targets, staged):
+            if args.gzip:
+                with profiling.page("<gzip>"), profiling.stage("gzip"):
+                    counts = gzip_tree(path, args.gzip_min_size, args.gzip_max_ratio)
+                print(
+                    f"Gzip {outdir}: {counts['written']} written, {counts['reused']} reused, "
+                    f"{counts['skipped']} skipped, {counts['removed']} removed"
+                )
+            elif removed := prune_gzip(path):
+                print(f"Removed {removed} out-of-date .gz file(s) from {outdir}")
+        for manifest in manifests:
+            manifest.save()
+    except BaseException:
+        for path in staged:
+            staging.abort(path)
+        raise
+    for (_, outdir), path, manifest in zip(targets, staged, manifests):
+        staging.commit(path, outdir)
+        manifest.root = Path(outdir)
+    if render_cache is not None:
+        evicted = render_cache.prune()
+        if evicted:
+            print(f"Evicted {len(evicted)} page(s) from the render cache")
+    for (_, outdir), pages, manifest in zip(targets, generated, manifests):
+        print(f"Generated {len(pages)} page(s) in {outdir}, {len(manifest.entries) - len(pages)} unchanged")
+
+    with profiling.page("<index>"), profiling.stage("index"):
+        index = ContentIndex.load(content_index_path)
+        changed, removed = index.update(dir_path_content, parsed)
+        index.save()
+    print(f"Content index: {len(index.pages)} page(s), {len(changed)} updated, {len(removed)} removed")
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.cprofile)
+        print(f"Wrote cProfile stats to {args.cprofile}")
+    if args.profile:
+        report = profiling.write_report(args.profile)
+        print(profiling.summary(report, args.profile_top))
+        print(f"Wrote profile report to {args.profile}")
+        profiling.disable()
+
+    if args.watch:
+        # The watcher keeps the first target up to date.
+        (basepath, outdir), manifest = targets[0], manifests[0]
+        watcher = SiteWatcher(
+            dir_path_content,
+            dir_path_static,
+            template_path,
+            outdir,
+            basepath,
+            manifest,
+            index,
+            static_compare=args.static_compare,
+            hardlink=args.hardlink,
+        )
+        watcher.run(args.watch_interval)
 
 
 if __name__ == "__main__":
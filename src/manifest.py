@@ -0,0 +1,98 @@
+import hashlib
+import json
+from pathlib import Path
+
+from staging import write_if_changed
+
+# Bump whenever a change to the generator alters the HTML it produces, so that
+# every page recorded by an older build is regenerated.
+GENERATOR_VERSION = "6"
+MANIFEST_NAME = ".build-manifest.json"
+
+
+def hash_file(path: str | Path) -> str:
+    """Return the hex sha256 digest of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def page_fingerprint(source_hash: str, template_hash: str, basepath: str, assets: str = "") -> dict:
+    """
+    Everything an output page depends on. A page is rebuilt when any of it changes.
+    assets is the digest of the fingerprinted asset names (urls.assets_digest()).
+    """
+    return {
+        "source": source_hash,
+        "template": template_hash,
+        "basepath": basepath,
+        "assets": assets,
+        "version": GENERATOR_VERSION,
+    }
+
+
+class BuildManifest:
+    """
+    Record of the inputs each output file was built from, stored as JSON in the
+    output directory. Keys are output paths relative to that directory.
+    """
+
+    def __init__(self, root: str | Path, entries: dict | None = None, static: list | None = None):
+        self.root = Path(root)
+        self.entries = entries if entries is not None else {}
+        # Relative paths of the files synced from the static directory.
+        self.static = static if static is not None else []
+
+    @property
+    def path(self) -> Path:
+        return self.root / MANIFEST_NAME
+
+    @classmethod
+    def load(cls, root: str | Path) -> "BuildManifest":
+        """Load the manifest from root. A missing or unreadable manifest is treated as empty."""
+        manifest = cls(root)
+        try:
+            data = json.loads(manifest.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return manifest
+        if isinstance(data, dict) and isinstance(data.get("pages"), dict):
+            manifest.entries = data["pages"]
+        if isinstance(data, dict) and isinstance(data.get("static"), list):
+            manifest.static = data["static"]
+        return manifest
+
+    def save(self) -> None:
+        data = {"version": GENERATOR_VERSION, "pages": self.entries, "static": self.static}
+        write_if_changed(self.path, [json.dumps(data, indent=1, sort_keys=True)])
+
+    def _key(self, dest: str | Path) -> str:
+        return Path(dest).resolve().relative_to(self.root.resolve()).as_posix()
+
+    def is_fresh(self, dest: str | Path, fingerprint: dict) -> bool:
+        """True if dest exists and was built from exactly these inputs."""
+        return self.entries.get(self._key(dest)) == fingerprint and Path(dest).is_file()
+
+    def record(self, dest: str | Path, fingerprint: dict) -> None:
+        self.entries[self._key(dest)] = fingerprint
+
+    def remove_stale(self, current: set) -> list:
+        """
+        Delete outputs recorded by a previous build that are not in current (a set
+        of output paths), along with any directories left empty. Returns the
+        removed paths.
+        """
+        keep = {self._key(p) for p in current}
+        removed = []
+        for key in sorted(set(self.entries) - keep):
+            del self.entries[key]
+            target = self.root / key
+            if target.is_file():
+                target.unlink()
+                removed.append(target)
+            parent = target.parent
+            while parent != self.root and parent.is_dir() and not any(parent.iterdir()):
+                parent.rmdir()
+                parent = parent.parent
+        return removed
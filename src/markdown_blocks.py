@@ -1,4 +1,37 @@
+import re
+
+# A blank or whitespace-only line (or a run of them) between two blocks.
+_BLOCK_SEPARATOR = re.compile(r"\n\s*\n")
+
+
+def iter_blocks(lines):
+    """
+    Yield the blocks of a markdown document given as an iterable of lines, e.g. an open
+    file. Blocks are separated by blank or whitespace-only lines; "\r\n" line endings
+    are normalised and each block is stripped. Only the current block is held in memory.
+    """
+    current = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.strip():
+            current.append(line)
+        elif current:
+            yield "\n".join(current).strip()
+            current = []
+    if current:
+        yield "\n".join(current).strip()
+
+
+def read_blocks(path):
+    """Lazily yield the blocks of the markdown file at path, reading it line by line."""
+    with open(path, encoding="utf-8") as f:
+        yield from iter_blocks(f)
+
+
 def markdown_to_blocks(markdown):
-    """Split a markdown document into blocks by double newlines. Strips each block and removes empty blocks."""
-    blocks = markdown.split("\n\n")
+    """
+    Split a markdown document into blocks by blank lines. Strips each block and removes empty blocks.
+    Same result as iter_blocks, but splits the whole string at once, which is faster when it is already in memory.
+    """
+    blocks = _BLOCK_SEPARATOR.split(markdown.replace("\r\n", "\n"))
     return [b.strip() for b in blocks if b.strip()]
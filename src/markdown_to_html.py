@@ -1,31 +1,107 @@
+import functools
 import re
+from typing import NamedTuple
 
-from block_type import BlockType, block_to_block_type
+from block_type import BlockType, classify_block
 from htmlnode import LeafNode, ParentNode
 from inline_markdown import text_to_textnodes
-from markdown_blocks import markdown_to_blocks
-from textnode import text_node_to_html_node
+from markdown_blocks import markdown_to_blocks, read_blocks
+import profiling
+from textnode import TextType, text_node_to_html_node
 
+# Link text containing any of these may hold nested inline markup.
+_INLINE_MARKUP = re.compile(r"\*\*|[_`]|!\[")
 
-def text_to_children(text):
-    """Convert inline markdown text to a list of HTML nodes (LeafNodes)."""
+
+def link_to_html_node(text_node):
+    """Convert a LINK TextNode, rendering inline markup in its text (e.g. bold) inside the <a>."""
+    if _INLINE_MARKUP.search(text_node.text):
+        inner = text_to_textnodes(text_node.text)
+        if inner and (len(inner) > 1 or inner[0].text_type != TextType.TEXT):
+            children = [text_node_to_html_node(tn) for tn in inner]
+            return ParentNode("a", children, {"href": text_node.url})
+    return text_node_to_html_node(text_node)
+
+
+def _inline_nodes(text):
     text_nodes = text_to_textnodes(text)
-    return [text_node_to_html_node(tn) for tn in text_nodes]
+    return tuple(
+        link_to_html_node(tn) if tn.text_type == TextType.LINK else text_node_to_html_node(tn)
+        for tn in text_nodes
+    )
+
+
+# Nav lines, footers and repeated list items recur across pages, so converted inline
+# runs are memoised per process (i.e. per build worker), keyed by their text. The
+# cached nodes are shared between pages and must not be modified.
+_cached_inline_nodes = functools.lru_cache(maxsize=4096)(_inline_nodes)
+
+
+def configure_inline_cache(maxsize: int) -> None:
+    """Replace the inline cache with an empty one holding up to maxsize fragments (0 disables it)."""
+    global _cached_inline_nodes
+    _cached_inline_nodes = functools.lru_cache(maxsize=maxsize)(_inline_nodes)
+
+
+def inline_cache_info():
+    """hits, misses, maxsize and currsize of the inline cache, as from functools.lru_cache."""
+    return _cached_inline_nodes.cache_info()
+
+
+def text_to_children(text):
+    """Convert inline markdown text to a list of HTML nodes (LeafNodes, or ParentNodes for links with markup)."""
+    with profiling.stage("inline"):
+        return list(_cached_inline_nodes(text))
+
+
+class Heading(NamedTuple):
+    level: int
+    # The heading's markdown, without the #s
+    text: str
+
+
+class Document(NamedTuple):
+    """
+    A parsed markdown document: its HTML tree, title (the first h1's text, or None),
+    heading outline, and the distinct link and image URLs it contains, in order.
+    """
+
+    node: ParentNode
+    title: str | None
+    headings: list
+    links: tuple = ()
+    images: tuple = ()
+
+
+def _collect_urls(node, links: list, images: list) -> None:
+    """Add the href of every <a> and the src of every <img> under node, as written in the markdown."""
+    if node.tag == "a":
+        links.append(node.props["href"])
+    elif node.tag == "img":
+        images.append(node.props["src"])
+    if node.children is not None:
+        for child in node.children:
+            _collect_urls(child, links, images)
 
 
 def block_to_html_node(block):
     """Convert a single markdown block to an HTML node (ParentNode or LeafNode)."""
-    block_type = block_to_block_type(block)
+    with profiling.stage("classify"):
+        classified = classify_block(block)
+    return _classified_block_to_html_node(block, classified)
+
 
+def _classified_block_to_html_node(block, classified):
+    block_type, lines, prefixes = classified
     if block_type == BlockType.PARAGRAPH:
         text = block.replace("\n", " ")
         children = text_to_children(text)
         return ParentNode("p", children)
 
     if block_type == BlockType.HEADING:
-        match = re.match(r"^(#{1,6}) ", block)
-        level = len(match.group(1))
-        content = block[match.end() :]
+        # The prefix is the #s plus one space
+        level = prefixes[0] - 1
+        content = block[prefixes[0] :]
         children = text_to_children(content)
         return ParentNode(f"h{level}", children)
 
@@ -36,29 +112,19 @@ def block_to_html_node(block):
         return ParentNode("pre", [code_node])
 
     if block_type == BlockType.QUOTE:
-        lines = block.split("\n")
-        content = " ".join(line.lstrip(">").lstrip() for line in lines)
+        content = " ".join(line[prefix:] for line, prefix in zip(lines, prefixes))
         children = text_to_children(content)
         return ParentNode("blockquote", children)
 
     if block_type == BlockType.UNORDERED_LIST:
-        lines = block.split("\n")
-        items = []
-        for line in lines:
-            item_content = line[2:]  # strip "- "
-            item_children = text_to_children(item_content)
-            items.append(ParentNode("li", item_children))
+        items = [ParentNode("li", text_to_children(line[2:])) for line in lines]  # strip "- "
         return ParentNode("ul", items)
 
     if block_type == BlockType.ORDERED_LIST:
-        lines = block.split("\n")
-        items = []
-        for i, line in enumerate(lines):
-            # strip "N. " (number + ". ")
-            prefix_len = len(str(i + 1)) + 2
-            item_content = line[prefix_len:]
-            item_children = text_to_children(item_content)
-            items.append(ParentNode("li", item_children))
+        # strip "N. " (number + ". ")
+        items = [
+            ParentNode("li", text_to_children(line[prefix:])) for line, prefix in zip(lines, prefixes)
+        ]
         return ParentNode("ol", items)
 
     # fallback paragraph
@@ -69,6 +135,43 @@ def block_to_html_node(block):
 
 def markdown_to_html_node(markdown):
     """Convert a full markdown document to a single parent HTMLNode (div) containing block nodes."""
-    blocks = markdown_to_blocks(markdown)
-    children = [block_to_html_node(block) for block in blocks]
-    return ParentNode("div", children)
+    return markdown_to_document(markdown).node
+
+
+def markdown_to_document(markdown):
+    """
+    Parse a full markdown document into a Document. The title, outline, links and
+    images come from the blocks and nodes found while building the tree, so the text
+    is only read once.
+    """
+    with profiling.stage("block_split"):
+        blocks = markdown_to_blocks(markdown)
+    children = []
+    headings = []
+    links = []
+    images = []
+    for block in blocks:
+        with profiling.stage("classify"):
+            classified = classify_block(block)
+        if classified.block_type == BlockType.HEADING:
+            # Only the first line of a heading block counts, as in extract_title.
+            text = block[classified.prefixes[0] :].split("\n", 1)[0].strip()
+            headings.append(Heading(classified.prefixes[0] - 1, text))
+        node = _classified_block_to_html_node(block, classified)
+        # Code blocks are literal text; links in them aren't links.
+        if classified.block_type != BlockType.CODE:
+            _collect_urls(node, links, images)
+        children.append(node)
+    title = next((heading.text for heading in headings if heading.level == 1), None)
+    return Document(
+        ParentNode("div", children), title, headings, tuple(dict.fromkeys(links)), tuple(dict.fromkeys(images))
+    )
+
+
+def markdown_file_to_html_node(path):
+    """
+    Like markdown_to_html_node, but for a file that may be too big to hold in memory:
+    the returned div reads, parses and yields its blocks one at a time as it is
+    serialised with iter_html(), so it can only be serialised once.
+    """
+    return ParentNode("div", (block_to_html_node(block) for block in read_blocks(path)))
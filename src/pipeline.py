@@ -0,0 +1,199 @@
+"""
+Asyncio build pipeline that overlaps file I/O with rendering.
+
+Pages flow through four stages connected by bounded queues:
+
+    discover -> read -> render -> write
+
+Discovery walks the page iterator (the content rglob plus manifest checks) on an I/O
+thread. Reads, render cache lookups and writes run on a thread pool of io_workers
+threads; rendering runs on a single thread, or on a pool of worker processes when
+jobs > 1. The queues hold at most queue_depth pages each, which bounds how much
+markdown and HTML is in memory while a slow stage catches up. On a slow (e.g.
+network) filesystem the disk then stays busy while pages are being rendered, and
+the CPU stays busy while the disk is.
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import gencontent
+from gencontent import (
+    decode_markdown,
+    fill_template,
+    generate_streamed_page,
+    page_cache_keys,
+    page_summary,
+    parse_page,
+    write_page,
+)
+from markdown_to_html import configure_inline_cache, inline_cache_info
+from render_cache import RenderCache
+from urls import assets, configure_assets
+
+# Marks the end of a queue; each consumer of a queue gets one.
+_DONE = object()
+
+
+def _render(source: bytes, from_path: str, template_path: str, basepaths: list) -> tuple:
+    """
+    Render stage body: parse the page once and return the finished page for each
+    basepath, its page_summary, and the inline cache (hits, misses) it caused.
+    """
+    before = inline_cache_info()
+    document = parse_page(decode_markdown(source), from_path)
+    pages = [
+        "".join(fill_template(document.title, document.node, template_path, basepath)) for basepath in basepaths
+    ]
+    after = inline_cache_info()
+    return pages, page_summary(source, document), after.hits - before.hits, after.misses - before.misses
+
+
+def _init_worker(inline_cache: int, asset_urls: dict) -> None:
+    if inline_cache_info().maxsize != inline_cache:
+        configure_inline_cache(inline_cache)
+    if assets() != asset_urls:
+        configure_assets(asset_urls)
+
+
+class Pipeline:
+    """
+    Generates (from_path, template_path, targets) pages with the stages
+    above. Produces the same files and log as main.generate_pages. The inline and
+    render cache hit counts of the last build, and the page_summary of each page it
+    parsed (by from_path), are kept on the instance.
+    """
+
+    def __init__(
+        self,
+        jobs: int = 1,
+        io_workers: int = 8,
+        queue_depth: int = 16,
+        render_cache: RenderCache | None = None,
+    ):
+        self.jobs = max(1, jobs)
+        self.io_workers = max(1, io_workers)
+        self.queue_depth = max(1, queue_depth)
+        self.render_cache = render_cache
+        self.inline_hits = 0
+        self.inline_misses = 0
+        self.parsed = {}
+
+    def build(self, pages) -> list:
+        """Generate every page from the iterable pages. Returns the page tuples, in discovery order."""
+        return asyncio.run(self.run(pages))
+
+    async def run(self, pages) -> list:
+        self.inline_hits = self.inline_misses = 0
+        self.parsed = {}
+        loop = asyncio.get_running_loop()
+        if self.jobs > 1:
+            renderer = ProcessPoolExecutor(
+                max_workers=self.jobs, initializer=_init_worker, initargs=(inline_cache_info().maxsize, assets())
+            )
+        else:
+            renderer = ThreadPoolExecutor(max_workers=1)
+        discovered = []
+        with ThreadPoolExecutor(max_workers=self.io_workers) as io, renderer:
+            to_read = asyncio.Queue(self.queue_depth)
+            to_render = asyncio.Queue(self.queue_depth)
+            to_write = asyncio.Queue(self.queue_depth)
+
+            async def discover():
+                it = iter(pages)
+                while (args := await loop.run_in_executor(io, next, it, _DONE)) is not _DONE:
+                    dests = ", ".join(dest_path for dest_path, _ in args[2])
+                    print(f"Generating page from {args[0]} to {dests} using {args[1]}")
+                    discovered.append(args)
+                    await to_read.put(args)
+
+            async def read(args):
+                from_path, template_path, targets = args
+                size = await loop.run_in_executor(io, lambda: Path(from_path).stat().st_size)
+                if size > gencontent.stream_threshold:
+                    # Too big to hold whole: generated block by block, once per target.
+                    return from_path, template_path, None, [(target, None) for target in targets]
+                source = await loop.run_in_executor(io, Path(from_path).read_bytes)
+                todo = [(target, None) for target in targets]
+                if self.render_cache is not None:
+                    basepaths = [basepath for _, basepath in targets]
+                    keys = await loop.run_in_executor(io, page_cache_keys, source, template_path, basepaths)
+                    todo = []
+                    for target, key in zip(targets, keys):
+                        if await loop.run_in_executor(io, self.render_cache.restore, key, target[0]):
+                            self.render_cache.hits += 1
+                        else:
+                            self.render_cache.misses += 1
+                            todo.append((target, key))
+                    if not todo:
+                        return None
+                return from_path, template_path, source, todo
+
+            async def render(item):
+                from_path, template_path, source, todo = item
+                if source is None:
+                    for (dest_path, basepath), _ in todo:
+                        await loop.run_in_executor(
+                            renderer, generate_streamed_page, from_path, template_path, dest_path, basepath
+                        )
+                    return None
+                basepaths = [basepath for (_, basepath), _ in todo]
+                pages, summary, hits, misses = await loop.run_in_executor(
+                    renderer, _render, source, from_path, template_path, basepaths
+                )
+                self.parsed[from_path] = summary
+                self.inline_hits += hits
+                self.inline_misses += misses
+                return [(dest_path, html, key) for ((dest_path, _), key), html in zip(todo, pages)]
+
+            async def write(item):
+                for dest_path, html, key in item:
+                    await loop.run_in_executor(io, write_page, dest_path, [html])
+                    if key is not None:
+                        await loop.run_in_executor(io, self.render_cache.store, key, dest_path)
+
+            await _run_stages(
+                [
+                    ([discover], None, to_read),
+                    ([read] * self.io_workers, to_read, to_render),
+                    ([render] * self.jobs, to_render, to_write),
+                    ([write] * self.io_workers, to_write, None),
+                ]
+            )
+        return discovered
+
+
+async def _run_stages(stages: list) -> None:
+    """
+    Run (workers, inbox, outbox) stages concurrently. A worker is called with each item
+    taken from inbox (or once, with no argument, when inbox is None) and whatever it
+    returns other than None is put in outbox. When every worker of a stage is done, the
+    next stage's workers are each sent _DONE. The first error cancels everything.
+    """
+    tasks = []
+    for index, (workers, inbox, outbox) in enumerate(stages):
+        consumers = len(stages[index + 1][0]) if outbox is not None else 0
+        tasks.append(asyncio.ensure_future(_stage(workers, inbox, outbox, consumers)))
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def _stage(workers: list, inbox, outbox, consumers: int) -> None:
+    async def loop(worker):
+        if inbox is None:
+            await worker()
+            return
+        while (item := await inbox.get()) is not _DONE:
+            result = await worker(item)
+            if result is not None and outbox is not None:
+                await outbox.put(result)
+
+    await asyncio.gather(*(loop(worker) for worker in workers))
+    for _ in range(consumers):
+        await outbox.put(_DONE)
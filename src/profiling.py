@@ -0,0 +1,122 @@
+"""
+Opt-in per-page, per-stage build instrumentation.
+
+Profiling is off by default and stage() then costs one function call. When enabled,
+every stage() block adds its wall time and the net change in allocated memory
+blocks (sys.getallocatedblocks) to the page currently being built.
+"""
+
+import contextlib
+import json
+import sys
+import time
+
+_NULL = contextlib.nullcontext()
+
+_enabled = False
+# Page name -> {stage: [seconds, allocated blocks]}
+_records: dict = {}
+_current: dict | None = None
+
+
+def enable() -> None:
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled, _current
+    _enabled = False
+    _current = None
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+@contextlib.contextmanager
+def _page(name: str):
+    global _current
+    previous = _current
+    _current = _records.setdefault(name, {})
+    try:
+        yield
+    finally:
+        _current = previous
+
+
+@contextlib.contextmanager
+def _stage(name: str):
+    record = _current if _current is not None else _records.setdefault("<build>", {})
+    blocks = sys.getallocatedblocks()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        totals = record.setdefault(name, [0.0, 0])
+        totals[0] += elapsed
+        totals[1] += sys.getallocatedblocks() - blocks
+
+
+def page(name: str):
+    """Context manager: attribute the stages run inside it to page name."""
+    return _page(name) if _enabled else _NULL
+
+
+def stage(name: str):
+    """Context manager: time the code inside it as stage name of the current page."""
+    return _stage(name) if _enabled else _NULL
+
+
+def take() -> dict:
+    """Return and clear the records collected so far (used to ship them out of worker processes)."""
+    global _records
+    records, _records = _records, {}
+    return records
+
+
+def merge(records: dict) -> None:
+    """Add records taken in another process to this one's."""
+    for name, stages in records.items():
+        target = _records.setdefault(name, {})
+        for stage_name, (seconds, blocks) in stages.items():
+            totals = target.setdefault(stage_name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += blocks
+
+
+def report() -> dict:
+    """Machine-readable report: per-page stage timings plus totals per stage."""
+    pages = {}
+    totals = {}
+    for name, stages in sorted(_records.items()):
+        pages[name] = {
+            "seconds": sum(seconds for seconds, _ in stages.values()),
+            "stages": {s: {"seconds": seconds, "allocated_blocks": blocks} for s, (seconds, blocks) in stages.items()},
+        }
+        for stage_name, (seconds, blocks) in stages.items():
+            total = totals.setdefault(stage_name, {"seconds": 0.0, "allocated_blocks": 0})
+            total["seconds"] += seconds
+            total["allocated_blocks"] += blocks
+    return {"stages": totals, "pages": pages}
+
+
+def write_report(path: str) -> dict:
+    data = report()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+    return data
+
+
+def summary(data: dict, top: int = 10) -> str:
+    """Human-readable totals per stage and the slowest pages."""
+    lines = [f"{'stage':<16}{'seconds':>10}{'blocks':>12}"]
+    for name, total in sorted(data["stages"].items(), key=lambda item: -item[1]["seconds"]):
+        lines.append(f"{name:<16}{total['seconds']:>10.4f}{total['allocated_blocks']:>12}")
+    slowest = sorted(data["pages"].items(), key=lambda item: -item[1]["seconds"])[:top]
+    lines.append(f"\nSlowest {len(slowest)} page(s):")
+    for name, page_data in slowest:
+        worst = max(page_data["stages"].items(), key=lambda item: item[1]["seconds"])[0]
+        lines.append(f"{page_data['seconds']:>10.4f}s  {name}  (mostly {worst})")
+    return "\n".join(lines)
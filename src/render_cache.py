@@ -0,0 +1,75 @@
+import hashlib
+import os
+from pathlib import Path
+
+from manifest import GENERATOR_VERSION
+from staging import copy_if_changed
+
+
+def cache_key(source_hash: str, template_hash: str, basepath: str, assets: str = "") -> str:
+    """Content address of a rendered page: everything its HTML depends on (as in page_fingerprint), hashed."""
+    digest = hashlib.sha256()
+    for part in (source_hash, template_hash, basepath, assets, GENERATOR_VERSION):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    Rendered pages stored on disk under their cache_key, so any build (or any machine
+    that restores the directory) can reuse a page rendered from the same markdown,
+    template and basepath instead of parsing it again. Entries live in
+    root/<first two hex digits>/<key>.html. A hit refreshes the entry's mtime, and
+    prune() evicts the least recently used entries once the cache exceeds max_bytes.
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int = 256 * 1024 * 1024):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.html"
+
+    def fetch(self, key: str, dest: str | Path) -> bool:
+        """Copy the page cached under key to dest. Returns False (a miss) if there is none."""
+        if self.restore(key, dest):
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def restore(self, key: str, dest: str | Path) -> bool:
+        """fetch without updating the hit and miss counts, for callers that count on another thread."""
+        entry = self._entry(key)
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            return False
+        copy_if_changed(entry, dest)
+        return True
+
+    def store(self, key: str, page: str | Path) -> None:
+        """Add the rendered page file to the cache under key."""
+        # Goes through a temporary file: workers may store the same key at once,
+        # and a reader must never see a half-written entry.
+        copy_if_changed(page, self._entry(key))
+
+    def prune(self) -> list:
+        """Delete least recently used entries until the cache fits in max_bytes. Returns the removed paths."""
+        entries = []
+        total = 0
+        for path in self.root.glob("*/*.html"):
+            stat = path.stat()
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+            total += stat.st_size
+        removed = []
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed.append(path)
+        return removed
@@ -0,0 +1,335 @@
+"""
+Preview/static server for the build output.
+
+Small files are served from an in-memory cache with precomputed strong ETags; files
+too big to cache are streamed with os.sendfile. Every request re-stats its file, so
+a rebuild invalidates exactly the entries whose files changed. Conditional GETs
+(If-None-Match, If-Modified-Since) get 304s, precompressed .gz siblings written by
+--gzip builds are sent to clients that accept gzip, and connections are kept alive
+and served concurrently by ThreadingHTTPServer.
+"""
+
+import argparse
+import collections
+import email.utils
+import hashlib
+import mimetypes
+import os
+import re
+import shutil
+import stat as stat_module
+import threading
+import urllib.parse
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import NamedTuple
+
+# Fingerprinted assets (see assets.py) never change under the same name.
+_FINGERPRINTED = re.compile(r"\.[0-9a-f]{8}\.[A-Za-z0-9]+$")
+
+
+class Entry(NamedTuple):
+    path: Path
+    size: int
+    mtime_ns: int
+    etag: str
+    # The file's bytes, or None for files too big to cache (sent with sendfile).
+    data: bytes | None
+
+
+def _etag(f) -> str:
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: f.read(1 << 16), b""):
+        digest.update(chunk)
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+class FileCache:
+    """
+    Thread-safe cache of Entry objects for the files under root, validated against
+    the file's (mtime, size) on every lookup. Files up to max_file_size bytes keep
+    their contents in memory, least recently used first out beyond max_bytes.
+    """
+
+    def __init__(self, root: str | Path, max_file_size: int = 1024 * 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.root = Path(root)
+        self.max_file_size = max_file_size
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: Path) -> Entry | None:
+        """The current Entry for path, or None if it isn't a file."""
+        entry, f = self.open(path)
+        if f is not None:
+            f.close()
+        return entry
+
+    def open(self, path: Path) -> tuple:
+        """
+        (Entry, file) for path, or (None, None) if it isn't a file. The entry is checked
+        against, or built from, the same open file, so a file replaced meanwhile (a
+        rebuild renames new files into place) never pairs new bytes with an old size.
+        For an entry without data, file is that open binary file, for the caller to
+        send and close; otherwise it is None.
+        """
+        try:
+            # Non-blocking, so a FIFO can't hang the thread before it is seen not to be a file.
+            f = os.fdopen(os.open(path, os.O_RDONLY | getattr(os, "O_NONBLOCK", 0)), "rb")
+        except OSError:
+            return None, None
+        try:
+            stat = os.fstat(f.fileno())
+            if not stat_module.S_ISREG(stat.st_mode):
+                f.close()
+                return None, None
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                    self._entries.move_to_end(path)
+                else:
+                    entry = None
+            if entry is None:
+                # Built outside the lock; two threads may race to build the same entry, which is harmless.
+                entry = self._build(path, f, stat)
+            if entry.data is not None:
+                f.close()
+                return entry, None
+            f.seek(0)
+            return entry, f
+        except BaseException:
+            f.close()
+            raise
+
+    def _build(self, path: Path, f, stat: os.stat_result) -> Entry:
+        data = None
+        if stat.st_size <= self.max_file_size:
+            data = f.read()
+            etag = f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+        else:
+            etag = _etag(f)
+        entry = Entry(path, stat.st_size, stat.st_mtime_ns, etag, data)
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None and old.data is not None:
+                self._bytes -= old.size
+            self._entries[path] = entry
+            if data is not None:
+                self._bytes += entry.size
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                if evicted.data is not None:
+                    self._bytes -= evicted.size
+        return entry
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """True if an Accept-Encoding header value allows gzip, honouring q-values (gzip;q=0 refuses it)."""
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    quality = qualities.get("gzip", qualities.get("x-gzip", qualities.get("*", 0.0)))
+    return quality > 0
+
+
+class SiteRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "SiteServer"
+    # Set on the handler subclass made by make_server.
+    cache: FileCache = None
+    verbose = False
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def _resolve(self, url_path: str) -> Path | None:
+        """The file or directory url_path names under the root, or None if it is outside it or hidden."""
+        root = self.cache.root.resolve()
+        rel = urllib.parse.unquote(url_path).lstrip("/")
+        path = (root / rel).resolve()
+        if path != root and root not in path.parents:
+            return None
+        # Hidden files are build state (the manifest, staging temp files), not the site.
+        if any(part.startswith(".") for part in path.relative_to(root).parts):
+            return None
+        return path
+
+    def _serve(self, send_body: bool) -> None:
+        url_path = urllib.parse.urlsplit(self.path).path
+        try:
+            path = self._resolve(url_path)
+        except (ValueError, OSError):
+            # e.g. an embedded NUL byte ("/%00"), which no file name can hold.
+            self._send_status(HTTPStatus.BAD_REQUEST)
+            return
+        if path is None:
+            self._send_status(HTTPStatus.NOT_FOUND)
+            return
+        if path.is_dir():
+            if not url_path.endswith("/"):
+                # Like http.server: relative links in index.html need the trailing slash.
+                self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+                self.send_header("Location", url_path + "/")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            path = path / "index.html"
+
+        files = []
+        try:
+            entry, f = self.cache.open(path)
+            files.append(f)
+            if entry is None:
+                self._send_status(HTTPStatus.NOT_FOUND)
+                return
+            content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            if content_type.startswith("text/") or content_type in ("application/javascript", "application/json"):
+                content_type += "; charset=utf-8"
+            body, body_file, encoding = entry, f, None
+            if accepts_gzip(self.headers.get("Accept-Encoding", "")):
+                gz, gz_file = self.cache.open(path.with_name(path.name + ".gz"))
+                files.append(gz_file)
+                # Only a sibling compressed from this version of the file (see compress.py).
+                if gz is not None and gz.mtime_ns == entry.mtime_ns:
+                    body, body_file, encoding = gz, gz_file, "gzip"
+
+            if self._not_modified(body):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self._send_validators(body, encoding)
+                self.end_headers()
+                return
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(body.size))
+            if encoding is not None:
+                self.send_header("Content-Encoding", encoding)
+            self._send_validators(body, encoding)
+            self.end_headers()
+            if send_body:
+                self._send_body(body, body_file)
+        finally:
+            for f in files:
+                if f is not None:
+                    f.close()
+
+    def _send_validators(self, entry: Entry, encoding: str | None) -> None:
+        self.send_header("ETag", entry.etag)
+        self.send_header("Last-Modified", email.utils.formatdate(entry.mtime_ns / 1e9, usegmt=True))
+        self.send_header("Vary", "Accept-Encoding")
+        if _FINGERPRINTED.search(self.path.split("?", 1)[0]):
+            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        else:
+            self.send_header("Cache-Control", "no-cache")
+
+    def _not_modified(self, entry: Entry) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or entry.etag in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return entry.mtime_ns // 10**9 <= since
+        return False
+
+    def _send_body(self, entry: Entry, f) -> None:
+        """Send entry's data, or the open file f it was built from."""
+        if entry.data is not None:
+            self.wfile.write(entry.data)
+            return
+        offset = 0
+        try:
+            while offset < entry.size:
+                sent = os.sendfile(self.connection.fileno(), f.fileno(), offset, entry.size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except (AttributeError, OSError):
+            # No sendfile on this platform or socket type: copy the rest through userspace,
+            # from wherever sendfile stopped.
+            f.seek(offset)
+            shutil.copyfileobj(f, self.wfile)
+
+    def _send_status(self, status: HTTPStatus) -> None:
+        body = f"{status.value} {status.phrase}\n".encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+
+class SiteServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # socketserver's default backlog of 5 refuses connections under load tests.
+    request_queue_size = 128
+
+
+def make_server(
+    directory: str | Path,
+    host: str = "",
+    port: int = 8888,
+    cache: FileCache | None = None,
+    verbose: bool = False,
+) -> SiteServer:
+    """A threading HTTP server serving directory; call serve_forever() on it."""
+    handler = type(
+        "Handler",
+        (SiteRequestHandler,),
+        {"cache": cache if cache is not None else FileCache(directory), "verbose": verbose},
+    )
+    return SiteServer((host, port), handler)
+
+
+def main(argv: list | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the built site.")
+    parser.add_argument("-d", "--directory", default="./docs", help="directory to serve (default ./docs)")
+    parser.add_argument("-b", "--bind", default="", help="address to listen on (default all)")
+    parser.add_argument("-p", "--port", type=int, default=8888)
+    parser.add_argument(
+        "--cache-mb", type=int, default=64, help="memory used for cached file contents (default 64)"
+    )
+    parser.add_argument(
+        "--max-cached-file-kb",
+        type=int,
+        default=1024,
+        help="files bigger than this are sent with sendfile instead of cached (default 1024)",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    cache = FileCache(args.directory, args.max_cached_file_kb * 1024, args.cache_mb * 1024 * 1024)
+    server = make_server(args.directory, args.bind, args.port, cache, args.verbose)
+    print(f"Serving {args.directory} on http://{args.bind or 'localhost'}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
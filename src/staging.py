@@ -0,0 +1,190 @@
+"""
+Staged builds: the site is built in a hardlinked clone of the output directory and
+swapped in when the build is done, so the live directory is never half built (and,
+where renameat2 is available, never missing either).
+
+Nothing may write into a staged file in place, because it shares its inode with the
+live copy. Every writer goes through a temporary file and os.replace, which gives the
+staged path a new inode; write_if_changed and copy_if_changed also keep the existing
+file (and its mtime) when the new bytes are identical, so rsync and CDN invalidation
+only see the pages that really changed.
+"""
+
+import ctypes
+import errno
+import filecmp
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+
+def staging_path(live: str | Path) -> Path:
+    live = Path(live)
+    return live.with_name(f".{live.name}.staging")
+
+
+def clone_tree(src: str | Path, dst: str | Path) -> None:
+    """Recreate src's directories under dst and hardlink every file into them."""
+    src = Path(src)
+    dst = Path(dst)
+    dst.mkdir(parents=True)
+    for dirpath, dirnames, filenames in os.walk(src):
+        target = dst / Path(dirpath).relative_to(src)
+        for name in dirnames:
+            (target / name).mkdir()
+        for name in filenames:
+            try:
+                os.link(os.path.join(dirpath, name), target / name)
+            except OSError:
+                # Filesystem without hardlinks: fall back to copying.
+                shutil.copy2(os.path.join(dirpath, name), target / name)
+
+
+def begin(live: str | Path) -> Path:
+    """Create a fresh staging directory holding a hardlinked clone of live (if any) and return it."""
+    live = Path(live)
+    staged = staging_path(live)
+    # Left over from an interrupted build.
+    shutil.rmtree(staged, ignore_errors=True)
+    if live.is_dir():
+        clone_tree(live, staged)
+    else:
+        staged.mkdir(parents=True)
+    return staged
+
+
+_RENAME_EXCHANGE = 2
+_AT_FDCWD = -100
+
+
+def _load_renameat2():
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        renameat2 = libc.renameat2
+    except (AttributeError, OSError, TypeError):
+        return None
+    renameat2.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint)
+    renameat2.restype = ctypes.c_int
+    return renameat2
+
+
+_renameat2 = _load_renameat2()
+
+
+def exchange(a: str | Path, b: str | Path) -> bool:
+    """
+    Atomically swap the paths a and b with renameat2(RENAME_EXCHANGE) (Linux 3.15+,
+    glibc 2.28+). Returns False, changing nothing, where that isn't available.
+    """
+    if _renameat2 is None:
+        return False
+    result = _renameat2(_AT_FDCWD, os.fsencode(a), _AT_FDCWD, os.fsencode(b), _RENAME_EXCHANGE)
+    if result == 0:
+        return True
+    error = ctypes.get_errno()
+    if error in (errno.ENOSYS, errno.EINVAL, errno.ENOTSUP):
+        # Kernel or filesystem without RENAME_EXCHANGE.
+        return False
+    raise OSError(error, os.strerror(error), str(a), None, str(b))
+
+
+def commit(staged: str | Path, live: str | Path) -> None:
+    """
+    Swap the staging directory in for live. Where the platform can exchange two paths
+    atomically (see exchange), live is always a complete tree, old or new. Elsewhere
+    the old tree is moved aside and the staged one renamed into place, so live is
+    briefly missing between the two renames, but never partial.
+    """
+    staged = Path(staged)
+    live = Path(live)
+    if live.is_dir() and exchange(staged, live):
+        # staged now holds the old tree.
+        shutil.rmtree(staged, ignore_errors=True)
+        return
+    old = live.with_name(f".{live.name}.old")
+    shutil.rmtree(old, ignore_errors=True)
+    if live.exists():
+        os.rename(live, old)
+    os.rename(staged, live)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def abort(staged: str | Path) -> None:
+    """Throw away a staging directory, leaving live untouched."""
+    shutil.rmtree(staged, ignore_errors=True)
+
+
+def replace_if_changed(tmp: str | Path, dest: str | Path) -> bool:
+    """
+    Move the finished temporary file tmp over dest unless dest already has the same
+    bytes, in which case tmp is discarded and dest keeps its mtime. Returns True if
+    dest was replaced.
+    """
+    try:
+        same = os.path.getsize(tmp) == os.path.getsize(dest) and filecmp.cmp(tmp, dest, shallow=False)
+    except FileNotFoundError:
+        same = False
+    if same:
+        os.unlink(tmp)
+        return False
+    os.replace(tmp, dest)
+    return True
+
+
+def _umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Read once at import: os.umask can only be read by setting it, which is not thread-safe.
+_NEW_FILE_MODE = 0o666 & ~_umask()
+
+
+def temporary_file(dest: str | Path) -> tuple:
+    """
+    Create a temporary file next to dest, to be renamed over it, and return its
+    (fd, path). mkstemp makes it 0600, which os.replace would publish, so it is given
+    dest's current mode, or the umask's default for a new file.
+    """
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.", suffix=".tmp")
+    try:
+        try:
+            mode = dest.stat().st_mode & 0o7777
+        except FileNotFoundError:
+            mode = _NEW_FILE_MODE
+        os.fchmod(fd, mode)
+    except BaseException:
+        os.close(fd)
+        os.unlink(tmp)
+        raise
+    return fd, tmp
+
+
+def write_if_changed(dest: str | Path, chunks) -> bool:
+    """Write text chunks to dest through a temporary file; see replace_if_changed."""
+    dest = Path(dest)
+    fd, tmp = temporary_file(dest)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.writelines(chunks)
+        return replace_if_changed(tmp, dest)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def copy_if_changed(src: str | Path, dest: str | Path) -> bool:
+    """Copy src's bytes to dest through a temporary file; see replace_if_changed."""
+    dest = Path(dest)
+    fd, tmp = temporary_file(dest)
+    try:
+        with os.fdopen(fd, "wb") as f, open(src, "rb") as source:
+            shutil.copyfileobj(source, f)
+        return replace_if_changed(tmp, dest)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
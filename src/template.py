@@ -0,0 +1,199 @@
+import hashlib
+import re
+from pathlib import Path
+
+from escaping import escape_text
+from urls import rewrite_url_attributes
+
+# {{ name }} slots and {% tag %} / {% tag "file.html" %} / {% tag name %} directives.
+_TOKEN = re.compile(r'\{\{\s*(\w+)\s*\}\}|\{%\s*(\w+)(?:\s+(?:"([^"]*)"|(\w+)))?\s*%\}')
+
+# Resolved template path -> (mtimes of every file it was compiled from, Template)
+_cache: dict = {}
+
+
+class TemplateError(ValueError):
+    pass
+
+
+class Template:
+    """
+    A compiled template: literal text pre-split around its slots, so rendering is a
+    single join. literals always has one more entry than slots.
+    """
+
+    def __init__(self, literals: tuple, slots: tuple, dependencies: tuple = ()):
+        self.literals = literals
+        self.slots = slots
+        self.dependencies = dependencies
+        digest = hashlib.sha256()
+        for literal, slot in zip(literals, slots + ("",)):
+            digest.update(literal.encode("utf-8"))
+            digest.update(b"\0" + slot.encode("utf-8") + b"\0")
+        self.digest = digest.hexdigest()
+        # URL resolver -> literals with their href/src attributes resolved.
+        self._resolved = {None: literals}
+
+    def resolved_literals(self, resolve_url=None) -> tuple:
+        """The literal segments with href and src URLs passed through resolve_url, computed once per resolver."""
+        literals = self._resolved.get(resolve_url)
+        if literals is None:
+            literals = tuple(rewrite_url_attributes(literal, resolve_url) for literal in self.literals)
+            self._resolved[resolve_url] = literals
+        return literals
+
+    def render(self, context: dict) -> str:
+        """
+        Fill every slot from context with string values, escaped unless they are
+        SafeStrings. Raises TemplateError for a slot with no value.
+        """
+        pieces = [""] * (2 * len(self.slots) + 1)
+        pieces[::2] = self.literals
+        try:
+            pieces[1::2] = [escape_text(context[name]) for name in self.slots]
+        except KeyError as e:
+            raise TemplateError(f"No value for template slot {{{{ {e.args[0]} }}}}") from None
+        return "".join(pieces)
+
+    def iter_render(self, context: dict, resolve_url=None):
+        """
+        Yield the filled template in chunks. Slot values may be strings or HtmlNodes;
+        nodes are streamed with iter_html() rather than serialised up front. resolve_url
+        is applied to href and src attributes in the template and in node slots; string
+        slot values are escaped, unless they are SafeStrings, and not resolved.
+        """
+        literals = self.resolved_literals(resolve_url)
+        for literal, name in zip(literals, self.slots):
+            yield literal
+            try:
+                value = context[name]
+            except KeyError:
+                raise TemplateError(f"No value for template slot {{{{ {name} }}}}") from None
+            if isinstance(value, str):
+                yield escape_text(value)
+            else:
+                yield from value.iter_html(resolve_url)
+        yield literals[-1]
+
+    def __repr__(self) -> str:
+        return f"Template(slots={self.slots!r})"
+
+
+def _parse(source: str, path: Path) -> list:
+    """
+    Parse template source into a tree of items: literal strings, ("var", name),
+    ("include", file), ("extends", file) and ("block", name, items).
+    """
+    root = []
+    stack = [(None, root)]
+    pos = 0
+    for match in _TOKEN.finditer(source):
+        items = stack[-1][1]
+        if match.start() > pos:
+            items.append(source[pos : match.start()])
+        pos = match.end()
+        var, tag, filename, name = match.groups()
+        if var is not None:
+            items.append(("var", var))
+        elif tag in ("include", "extends") and filename is not None:
+            items.append((tag, filename))
+        elif tag == "block" and name is not None:
+            block = ("block", name, [])
+            items.append(block)
+            stack.append((name, block[2]))
+        elif tag == "endblock" and len(stack) > 1:
+            stack.pop()
+        else:
+            raise TemplateError(f"{path}: invalid template tag {match.group(0)!r}")
+    if len(stack) > 1:
+        raise TemplateError(f"{path}: unclosed {{% block {stack[-1][0]} %}}")
+    if pos < len(source):
+        stack[-1][1].append(source[pos:])
+    return root
+
+
+def _load(path: Path, seen: tuple, dependencies: list) -> list:
+    """Parse path and resolve its layout, returning an item tree with blocks filled in."""
+    if path in seen:
+        raise TemplateError(f"Template cycle: {' -> '.join(str(p) for p in seen + (path,))}")
+    dependencies.append(path)
+    items = _parse(path.read_text(encoding="utf-8"), path)
+    seen = seen + (path,)
+
+    first = next((item for item in items if not isinstance(item, str) or item.strip()), None)
+    if not (isinstance(first, tuple) and first[0] == "extends"):
+        return [_resolve_includes(item, path, seen, dependencies) for item in items]
+
+    # Layout inheritance: only the child's blocks matter, everything else is the parent's.
+    overrides = {item[1]: item[2] for item in items if isinstance(item, tuple) and item[0] == "block"}
+    parent = _load(path.parent / first[1], seen, dependencies)
+    return _fill_blocks(parent, overrides, path, seen, dependencies)
+
+
+def _resolve_includes(item, path: Path, seen: tuple, dependencies: list):
+    if isinstance(item, str) or item[0] == "var":
+        return item
+    if item[0] == "include":
+        return ("items", _load(path.parent / item[1], seen, dependencies))
+    if item[0] == "block":
+        return ("block", item[1], [_resolve_includes(i, path, seen, dependencies) for i in item[2]])
+    raise TemplateError(f"{path}: {{% extends %}} must be the first tag in a template")
+
+
+def _fill_blocks(items: list, overrides: dict, path: Path, seen: tuple, dependencies: list) -> list:
+    filled = []
+    for item in items:
+        if isinstance(item, tuple) and item[0] == "block":
+            if item[1] in overrides:
+                body = [_resolve_includes(i, path, seen, dependencies) for i in overrides[item[1]]]
+            else:
+                body = item[2]
+            item = ("block", item[1], _fill_blocks(body, overrides, path, seen, dependencies))
+        elif isinstance(item, tuple) and item[0] == "items":
+            item = ("items", _fill_blocks(item[1], overrides, path, seen, dependencies))
+        filled.append(item)
+    return filled
+
+
+def _flatten(items: list, literals: list, slots: list) -> None:
+    for item in items:
+        if isinstance(item, str):
+            literals[-1] += item
+        elif item[0] == "var":
+            slots.append(item[1])
+            literals.append("")
+        elif item[0] == "block":
+            _flatten(item[2], literals, slots)
+        else:
+            _flatten(item[1], literals, slots)
+
+
+def compile_template(path: str | Path) -> Template:
+    """Compile the template at path, resolving {% extends %} layouts and {% include %} partials."""
+    dependencies = []
+    items = _load(Path(path).resolve(), (), dependencies)
+    literals = [""]
+    slots = []
+    _flatten(items, literals, slots)
+    return Template(tuple(literals), tuple(slots), tuple(dependencies))
+
+
+def _mtimes(paths: tuple) -> tuple | None:
+    try:
+        return tuple(p.stat().st_mtime_ns for p in paths)
+    except OSError:
+        return None
+
+
+def load_template(path: str | Path) -> Template:
+    """
+    Return the compiled template for path, recompiling only when it, its layout or
+    one of its partials has been modified since it was last compiled.
+    """
+    key = Path(path).resolve()
+    cached = _cache.get(key)
+    if cached is not None and _mtimes(cached[1].dependencies) == cached[0]:
+        return cached[1]
+    template = compile_template(key)
+    _cache[key] = (_mtimes(template.dependencies), template)
+    return template
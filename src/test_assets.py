@@ -0,0 +1,72 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from assets import asset_urls, fingerprint_assets, fingerprinted_name, write_asset_manifest
+from copy_static import sync_directory
+
+
+class TestAssets(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.static = self.root / "static"
+        (self.static / "images").mkdir(parents=True)
+        (self.static / "index.css").write_text("body{}", encoding="utf-8")
+        (self.static / "images" / "a.png").write_bytes(b"png")
+        (self.static / "robots.txt").write_text("User-agent: *", encoding="utf-8")
+        (self.static / "favicon.ico").write_bytes(b"ico")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_fingerprinted_name(self):
+        self.assertEqual(fingerprinted_name("images/logo.png", "3f2a9c1b77"), "images/logo.3f2a9c1b.png")
+
+    def test_only_assets_are_fingerprinted(self):
+        names = fingerprint_assets(self.static)
+        self.assertEqual(sorted(names), ["images/a.png", "index.css"])
+        self.assertRegex(names["index.css"], r"^index\.[0-9a-f]{8}\.css$")
+        self.assertEqual(asset_urls(names)["/index.css"], "/" + names["index.css"])
+
+    def test_files_referenced_from_css_keep_their_names(self):
+        (self.static / "fonts").mkdir()
+        (self.static / "fonts" / "serif.woff2").write_bytes(b"font")
+        (self.static / "fonts" / "unused.woff2").write_bytes(b"font")
+        (self.static / "images" / "bg.png").write_bytes(b"bg")
+        (self.static / "images" / "icons.css").write_text("i{background:url(bg.png)}", encoding="utf-8")
+        (self.static / "index.css").write_text(
+            '@import "images/icons.css";\n'
+            '@font-face{src:url("/fonts/serif.woff2?v=2") format("woff2")}\n'
+            "body{background:url(data:image/png;base64,AAAA),url(https://example.com/x.png)}",
+            encoding="utf-8",
+        )
+        names = fingerprint_assets(self.static)
+        self.assertEqual(sorted(names), ["images/a.png", "index.css"])
+
+    def test_name_follows_content(self):
+        before = fingerprint_assets(self.static)
+        self.assertEqual(fingerprint_assets(self.static), before)
+        (self.static / "index.css").write_text("body{color:red}", encoding="utf-8")
+        after = fingerprint_assets(self.static)
+        self.assertNotEqual(after["index.css"], before["index.css"])
+        self.assertEqual(after["images/a.png"], before["images/a.png"])
+
+    def test_sync_under_fingerprinted_names(self):
+        docs = self.root / "docs"
+        names = fingerprint_assets(self.static)
+        synced = sync_directory(str(self.static), str(docs), names=names)
+        self.assertEqual(synced, {names["index.css"], names["images/a.png"], "robots.txt", "favicon.ico"})
+        self.assertTrue((docs / names["index.css"]).is_file())
+        self.assertFalse((docs / "index.css").exists())
+        # Turning fingerprinting off again replaces the hashed copies.
+        synced = sync_directory(str(self.static), str(docs), synced)
+        self.assertTrue((docs / "index.css").is_file())
+        self.assertFalse((docs / names["index.css"]).exists())
+        manifest = write_asset_manifest(docs, names)
+        self.assertEqual(json.loads(manifest.read_text(encoding="utf-8")), names)
+
+
+if __name__ == "__main__":
+    unittest.main()
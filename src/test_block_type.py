@@ -1,6 +1,6 @@
 import unittest
 
-from block_type import BlockType, block_to_block_type
+from block_type import BlockType, block_to_block_type, classify_block
 
 
 class TestBlockToBlockType(unittest.TestCase):
@@ -82,5 +82,36 @@ class TestBlockToBlockType(unittest.TestCase):
         self.assertEqual(block_to_block_type("1. item\n2 wrong"), BlockType.PARAGRAPH)
 
 
+class TestClassifyBlock(unittest.TestCase):
+    def test_heading_prefix(self):
+        result = classify_block("### Title")
+        self.assertEqual(result.block_type, BlockType.HEADING)
+        self.assertEqual(result.prefixes, [4])
+
+    def test_quote_lines_and_prefixes(self):
+        result = classify_block("> one\n>two\n>>  three")
+        self.assertEqual(result.block_type, BlockType.QUOTE)
+        self.assertEqual(result.lines, ["> one", ">two", ">>  three"])
+        self.assertEqual(result.prefixes, [2, 1, 4])
+
+    def test_ordered_list_prefixes_grow_with_numbers(self):
+        block = "\n".join(f"{i}. item" for i in range(1, 12))
+        result = classify_block(block)
+        self.assertEqual(result.block_type, BlockType.ORDERED_LIST)
+        self.assertEqual(result.prefixes, [3] * 9 + [4, 4])
+
+    def test_ordered_list_rejects_leading_zero(self):
+        self.assertEqual(classify_block("01. item").block_type, BlockType.PARAGRAPH)
+
+    def test_unordered_list_prefixes(self):
+        result = classify_block("- a\n- b")
+        self.assertEqual(result.lines, ["- a", "- b"])
+        self.assertEqual(result.prefixes, [2, 2])
+
+    def test_paragraph_and_code_carry_no_lines(self):
+        self.assertEqual(classify_block("plain\ntext"), (BlockType.PARAGRAPH, None, None))
+        self.assertEqual(classify_block("```\ncode\n```"), (BlockType.CODE, None, None))
+
+
 if __name__ == "__main__":
     unittest.main()
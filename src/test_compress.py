@@ -0,0 +1,86 @@
+import gzip
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from compress import gzip_file, gzip_tree, prune_gzip
+
+PAGE = "<p>" + "repetitive text " * 200 + "</p>"
+
+
+class TestGzip(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, rel, data):
+        path = self.root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(data, str):
+            path.write_text(data, encoding="utf-8")
+        else:
+            path.write_bytes(data)
+        return path
+
+    def test_written_then_reused(self):
+        page = self.write("index.html", PAGE)
+        self.assertEqual(gzip_file(page), "written")
+        gz = self.root / "index.html.gz"
+        self.assertEqual(gzip.decompress(gz.read_bytes()).decode("utf-8"), PAGE)
+        self.assertEqual(gz.stat().st_mtime_ns, page.stat().st_mtime_ns)
+        self.assertEqual(gzip_file(page), "reused")
+
+    def test_sibling_mode_follows_umask(self):
+        umask = os.umask(0)
+        os.umask(umask)
+        gzip_file(self.write("index.html", PAGE))
+        self.assertEqual((self.root / "index.html.gz").stat().st_mode & 0o777, 0o666 & ~umask)
+
+    def test_changed_source_is_recompressed(self):
+        page = self.write("index.html", PAGE)
+        gzip_file(page)
+        self.write("index.html", PAGE + "<p>more</p>")
+        os.utime(page, ns=(1, 10**9))
+        self.assertEqual(gzip_file(page), "written")
+        self.assertTrue(gzip.decompress((self.root / "index.html.gz").read_bytes()).endswith(b"<p>more</p>"))
+
+    def test_small_or_incompressible_files_are_skipped(self):
+        small = self.write("small.css", "a{}")
+        noise = self.write("noise.js", os.urandom(4096))
+        self.assertEqual(gzip_file(small), "skipped")
+        self.assertEqual(gzip_file(noise), "skipped")
+        self.assertEqual(sorted(p.name for p in self.root.iterdir()), ["noise.js", "small.css"])
+
+    def test_tree(self):
+        self.write("index.html", PAGE)
+        self.write("blog/post.html", PAGE)
+        self.write("images/pic.png", PAGE)
+        self.write(".build-manifest.json", PAGE)
+        self.write("old.html.gz", b"stale")
+        self.write("archive.tar.gz", b"content")
+        counts = gzip_tree(self.root, jobs=2)
+        self.assertEqual(counts, {"written": 2, "reused": 0, "skipped": 0, "removed": 1})
+        self.assertTrue((self.root / "blog" / "post.html.gz").is_file())
+        self.assertFalse((self.root / "images" / "pic.png.gz").exists())
+        self.assertFalse((self.root / ".build-manifest.json.gz").exists())
+        self.assertTrue((self.root / "archive.tar.gz").is_file())
+        self.assertEqual(gzip_tree(self.root)["reused"], 2)
+
+    def test_prune_removes_out_of_date_siblings(self):
+        page = self.write("index.html", PAGE)
+        kept = self.write("post.html", PAGE)
+        gzip_tree(self.root)
+        os.utime(page, ns=(1, 10**9))
+        self.assertEqual(prune_gzip(self.root), 1)
+        self.assertFalse((self.root / "index.html.gz").exists())
+        self.assertTrue((self.root / "post.html.gz").exists())
+        kept.unlink()
+        self.assertEqual(prune_gzip(self.root), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
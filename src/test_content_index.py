@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+
+from content_index import ContentIndex, index_markdown
+from gencontent import page_summary
+from markdown_to_html import markdown_to_document
+
+
+class TestIndexMarkdown(unittest.TestCase):
+    def test_title_links_and_images(self):
+        md = (
+            "## Intro\n\n# Title\n\nSee [home](/) and [docs](https://example.com/) and [home again](/).\n\n"
+            "![pic](/a.png)\n\n```\n[not a link](/code)\n```\n\n# Second h1"
+        )
+        self.assertEqual(
+            index_markdown(md),
+            {"title": "Title", "links": ["/", "https://example.com/"], "images": ["/a.png"]},
+        )
+
+    def test_code_spans_are_not_links(self):
+        md = "# T\n\nUse `[x](/in-code)` or `![y](/in-code.png)`, then [real](/real)."
+        self.assertEqual(index_markdown(md), {"title": "T", "links": ["/real"], "images": []})
+
+    def test_no_title(self):
+        self.assertIsNone(index_markdown("just text")["title"])
+
+
+class TestContentIndex(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.content = self.root / "content"
+        (self.content / "blog").mkdir(parents=True)
+        self.write("index.md", "# Home\n\n[post](/blog/post)")
+        self.write("blog/post.md", "# Post\n\n![img](/i.png)")
+        self.path = self.root / "index.json"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, rel, text):
+        (self.content / rel).write_text(text, encoding="utf-8")
+
+    def test_update_and_reload(self):
+        index = ContentIndex.load(self.path)
+        self.assertEqual(index.update(self.content), (["blog/post.md", "index.md"], []))
+        index.save()
+        index = ContentIndex.load(self.path)
+        entry = index.page("blog/post.md")
+        self.assertEqual(entry["title"], "Post")
+        self.assertEqual(entry["images"], ["/i.png"])
+        self.assertEqual(entry["size"], len("# Post\n\n![img](/i.png)"))
+        self.assertIs(index.page_for_output("index.html"), index.page("index.md"))
+        self.assertEqual(index.page_for_output("index.html")["links"], ["/blog/post"])
+
+    def test_only_changed_files_are_reread(self):
+        index = ContentIndex.load(self.path)
+        index.update(self.content)
+        self.assertEqual(index.update(self.content), ([], []))
+        # Same size and mtime: trusted without reading.
+        post = self.content / "blog" / "post.md"
+        stat = post.stat()
+        post.write_text("# Pots\n\n![img](/i.png)", encoding="utf-8")
+        os.utime(post, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(index.update(self.content), ([], []))
+        self.write("blog/post.md", "# Renamed post")
+        changed, removed = index.update(self.content)
+        self.assertEqual(changed, ["blog/post.md"])
+        self.assertEqual(index.page("blog/post.md")["title"], "Renamed post")
+
+    def test_summaries_from_the_build_are_not_reparsed(self):
+        source = (self.content / "index.md").read_bytes()
+        parsed = {str(self.content / "index.md"): page_summary(source, markdown_to_document(source.decode()))}
+        index = ContentIndex.load(self.path)
+        with mock.patch("content_index.index_markdown", wraps=index_markdown) as reparse:
+            index.update(self.content, parsed)
+        # Only the page the build didn't parse.
+        self.assertEqual(reparse.call_count, 1)
+        self.assertEqual(index.page("index.md")["links"], ["/blog/post"])
+
+    def test_outdated_summary_is_ignored(self):
+        stale = page_summary(b"# Old", markdown_to_document("# Old"))
+        index = ContentIndex.load(self.path)
+        index.update(self.content, {str(self.content / "index.md"): stale})
+        self.assertEqual(index.page("index.md")["title"], "Home")
+
+    def test_removed_pages(self):
+        index = ContentIndex.load(self.path)
+        index.update(self.content)
+        (self.content / "blog" / "post.md").unlink()
+        self.assertEqual(index.update(self.content), ([], ["blog/post.md"]))
+        self.assertIsNone(index.page_for_output("blog/post.html"))
+
+    def test_corrupt_index_is_empty(self):
+        self.path.write_text("{not json", encoding="utf-8")
+        self.assertEqual(ContentIndex.load(self.path).pages, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from copy_static import sync_directory
+
+
+class TestSyncDirectory(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        self.src = root / "static"
+        self.dst = root / "docs"
+        (self.src / "images").mkdir(parents=True)
+        (self.src / "index.css").write_text("body {}", encoding="utf-8")
+        (self.src / "images" / "a.png").write_bytes(b"png")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_copies_everything_first_time(self):
+        synced = sync_directory(str(self.src), str(self.dst))
+        self.assertEqual(synced, {"index.css", "images/a.png"})
+        self.assertEqual((self.dst / "images" / "a.png").read_bytes(), b"png")
+
+    def test_unchanged_files_are_not_recopied(self):
+        sync_directory(str(self.src), str(self.dst))
+        with self.assertNoLogs(level="INFO"):
+            sync_directory(str(self.src), str(self.dst))
+
+    def test_changed_file_is_recopied(self):
+        sync_directory(str(self.src), str(self.dst))
+        (self.src / "index.css").write_text("body { color: red }", encoding="utf-8")
+        with self.assertLogs(level="INFO") as logs:
+            sync_directory(str(self.src), str(self.dst))
+        self.assertEqual(len(logs.output), 1)
+        self.assertEqual((self.dst / "index.css").read_text(encoding="utf-8"), "body { color: red }")
+
+    def test_hash_compare_detects_same_size_edit(self):
+        sync_directory(str(self.src), str(self.dst))
+        target = self.dst / "images" / "a.png"
+        target.write_bytes(b"PNG")
+        stat = (self.src / "images" / "a.png").stat()
+        os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        sync_directory(str(self.src), str(self.dst))
+        self.assertEqual(target.read_bytes(), b"PNG")
+        sync_directory(str(self.src), str(self.dst), compare="hash")
+        self.assertEqual(target.read_bytes(), b"png")
+
+    def test_removed_files_are_deleted_but_others_kept(self):
+        previous = sync_directory(str(self.src), str(self.dst))
+        (self.dst / "index.html").write_text("page", encoding="utf-8")
+        (self.src / "images" / "a.png").unlink()
+        synced = sync_directory(str(self.src), str(self.dst), previous)
+        self.assertEqual(synced, {"index.css"})
+        self.assertFalse((self.dst / "images").exists())
+        self.assertTrue((self.dst / "index.html").exists())
+
+    def test_hardlink(self):
+        sync_directory(str(self.src), str(self.dst), link=True)
+        self.assertTrue(os.path.samefile(self.src / "index.css", self.dst / "index.css"))
+
+    def test_stale_temp_link_is_replaced(self):
+        self.dst.mkdir()
+        (self.dst / "index.css.tmp-link").write_text("stale", encoding="utf-8")
+        sync_directory(str(self.src), str(self.dst), link=True)
+        self.assertTrue(os.path.samefile(self.src / "index.css", self.dst / "index.css"))
+        self.assertFalse((self.dst / "index.css.tmp-link").exists())
+
+    def test_stale_temp_copy_is_not_written_through(self):
+        self.dst.mkdir()
+        live = Path(self._tmp.name) / "live.css"
+        live.write_text("live", encoding="utf-8")
+        os.link(live, self.dst / "index.css.tmp-copy")
+        sync_directory(str(self.src), str(self.dst))
+        self.assertEqual(live.read_text(encoding="utf-8"), "live")
+        self.assertEqual((self.dst / "index.css").read_text(encoding="utf-8"), "body {}")
+
+    def test_missing_source_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            sync_directory(str(self.src / "nope"), str(self.dst))
+
+
+if __name__ == "__main__":
+    unittest.main()
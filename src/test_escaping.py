@@ -0,0 +1,34 @@
+import unittest
+
+from escaping import SafeString, escape_attribute, escape_text
+
+
+class TestEscaping(unittest.TestCase):
+    def test_plain_text_is_returned_as_is(self):
+        text = "nothing to see here, 'quotes' and \"double quotes\" included"
+        self.assertIs(escape_text(text), text)
+
+    def test_text_specials(self):
+        self.assertEqual(escape_text('a < b && c > "d"'), 'a &lt; b &amp;&amp; c &gt; "d"')
+
+    def test_attribute_specials(self):
+        self.assertEqual(escape_attribute('/a?x=1&y="2"<>'), "/a?x=1&amp;y=&quot;2&quot;&lt;&gt;")
+        url = "/plain/url.html"
+        self.assertIs(escape_attribute(url), url)
+
+    def test_safe_string_is_not_escaped(self):
+        html = SafeString("<b>&amp;</b>")
+        self.assertIs(escape_text(html), html)
+        self.assertIs(escape_attribute(html), html)
+
+    def test_operations_on_safe_string_are_unsafe(self):
+        combined = SafeString("<b>") + "<i>"
+        self.assertNotIsInstance(combined, SafeString)
+        self.assertEqual(escape_text(combined), "&lt;b&gt;&lt;i&gt;")
+
+    def test_already_escaped_text_is_escaped_again(self):
+        self.assertEqual(escape_text("&amp;"), "&amp;amp;")
+
+
+if __name__ == "__main__":
+    unittest.main()
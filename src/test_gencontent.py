@@ -1,6 +1,12 @@
+import contextlib
+import io
+import tempfile
 import unittest
+from pathlib import Path
 
-from gencontent import extract_title
+import gencontent
+from gencontent import extract_title, generate_page, parse_page, render_page
+from urls import configure_assets
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -46,5 +52,98 @@ no title
             pass
 
 
+    def test_code_block_is_not_the_title(self):
+        self.assertEqual(extract_title("```\n# comment\n```\n\n# Title"), "Title")
+        self.assertEqual(extract_title("Text\n# inside a paragraph\n\n# Title"), "Title")
+
+
+class TestParsePage(unittest.TestCase):
+    def test_document(self):
+        document = parse_page("# Hello\n\n## Intro\n\ntext")
+        self.assertEqual(document.title, "Hello")
+        self.assertEqual([heading.text for heading in document.headings], ["Hello", "Intro"])
+        self.assertEqual(document.node.tag, "div")
+
+    def test_missing_title_names_the_source(self):
+        with self.assertRaisesRegex(ValueError, r"^content/post\.md: .*h1"):
+            parse_page("## Only a subheading", "content/post.md")
+
+
+class TestRenderPage(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.template = Path(self._tmp.name) / "template.html"
+        self.template.write_text(
+            '<link href="/index.css"><title>{{ Title }}</title>{{ Content }}', encoding="utf-8"
+        )
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_render_page(self):
+        html = "".join(render_page("# Hi\n\n[home](/)", str(self.template)))
+        self.assertEqual(
+            html,
+            '<link href="/index.css"><title>Hi</title><div><h1>Hi</h1><p><a href="/">home</a></p></div>',
+        )
+
+    def test_render_page_basepath(self):
+        html = "".join(render_page("# Hi\n\n![pic](/a.png)", str(self.template), "/repo/"))
+        self.assertIn('href="/repo/index.css"', html)
+        self.assertIn('src="/repo/a.png"', html)
+
+    def test_render_page_basepath_leaves_code_alone(self):
+        markdown = '# Hi\n\n```\n<a href="/x">x</a>\n```\n\n`src="/y"`'
+        html = "".join(render_page(markdown, str(self.template), "/repo/"))
+        self.assertIn('<code>&lt;a href="/x"&gt;x&lt;/a&gt;\n</code>', html)
+        self.assertIn('<code>src="/y"</code>', html)
+        self.assertIn('href="/repo/index.css"', html)
+
+    def test_render_page_fingerprinted_assets(self):
+        configure_assets({"/index.css": "/index.abc.css", "/a.png": "/a.def.png"})
+        try:
+            html = "".join(render_page("# Hi\n\n![pic](/a.png) [css](/index.css)", str(self.template), "/repo/"))
+        finally:
+            configure_assets(None)
+        self.assertIn('<link href="/repo/index.abc.css">', html)
+        self.assertIn('src="/repo/a.def.png"', html)
+        self.assertIn('<a href="/repo/index.abc.css">css</a>', html)
+
+    def test_render_page_missing_title_raises_before_yielding(self):
+        with self.assertRaises(ValueError):
+            render_page("no title", str(self.template))
+
+
+class TestStreamedPage(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.template = self.root / "template.html"
+        self.template.write_text("<title>{{ Title }}</title>{{ Content }}", encoding="utf-8")
+        self.source = self.root / "big.md"
+        block = "Some **bold** and [a link](/x) here.\r\n\r\n- one\r\n- two\r\n\r\n"
+        self.source.write_text("# Big\r\n\r\n" + block * 2000, encoding="utf-8")
+        self.original = gencontent.stream_threshold
+
+    def tearDown(self):
+        gencontent.stream_threshold = self.original
+        self._tmp.cleanup()
+
+    def generate(self, name):
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_page(str(self.source), str(self.template), str(self.root / name))
+        return (self.root / name).read_text(encoding="utf-8")
+
+    def test_streamed_matches_in_memory(self):
+        expected = self.generate("whole.html")
+        gencontent.stream_threshold = 0
+        self.assertEqual(self.generate("streamed.html"), expected)
+
+    def test_streamed_title_skips_code_blocks(self):
+        self.source.write_text("```\n# not a title\n```\n\nText\n\n# Real", encoding="utf-8")
+        gencontent.stream_threshold = 0
+        self.assertTrue(self.generate("streamed.html").startswith("<title>Real</title>"))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,7 @@
+import io
 import unittest
 
+from escaping import SafeString
 from htmlnode import HtmlNode, LeafNode, ParentNode
 
 
@@ -49,6 +51,26 @@ class TestLeafNode(unittest.TestCase):
         node = LeafNode(None, "Raw text only")
         self.assertEqual(node.to_html(), "Raw text only")
 
+    def test_leaf_value_and_props_are_escaped(self):
+        node = LeafNode("a", "<b> & co", {"href": "/q?a=1&b=2", "title": 'say "hi"'})
+        self.assertEqual(
+            node.to_html(), '<a href="/q?a=1&amp;b=2" title="say &quot;hi&quot;">&lt;b&gt; &amp; co</a>'
+        )
+        self.assertEqual(LeafNode(None, "1 < 2").to_html(), "1 &lt; 2")
+
+    def test_leaf_safe_value_is_not_escaped(self):
+        node = LeafNode("code", SafeString('<span class="k">def</span>'))
+        self.assertEqual(node.to_html(), '<code><span class="k">def</span></code>')
+
+    def test_non_string_props_and_values(self):
+        node = LeafNode("img", 0, {"width": 100, "data-ratio": 1.5, "hidden": True})
+        self.assertEqual(node.to_html(), '<img width="100" data-ratio="1.5" hidden="True">0</img>')
+        self.assertEqual(HtmlNode("td", props={"colspan": 2}).props_to_html(), ' colspan="2"')
+
+    def test_safe_attribute_is_not_escaped(self):
+        node = LeafNode("a", "x", {"title": SafeString("&amp;")})
+        self.assertEqual(node.to_html(), '<a title="&amp;">x</a>')
+
     def test_leaf_no_value_raises(self):
         with self.assertRaises(ValueError):
             LeafNode("p", None)
@@ -115,5 +137,73 @@ class TestParentNode(unittest.TestCase):
             '<div class="container"><span>child</span></div>',
         )
 
+class TestCompactNodes(unittest.TestCase):
+    def test_nodes_have_no_instance_dict(self):
+        for node in (HtmlNode("p"), LeafNode("b", "x"), ParentNode("div", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+
+    def test_props_are_kept_as_given(self):
+        props = {}
+        node = LeafNode("a", "x", props)
+        self.assertIs(node.props, props)
+        self.assertEqual(repr(node), "LeafNode(tag='a', value='x', props={})")
+        self.assertEqual(node.to_html(), "<a>x</a>")
+
+    def test_base_node_takes_children(self):
+        child = LeafNode("b", "x")
+        node = HtmlNode("p", None, [child])
+        self.assertEqual(node.children, [child])
+        self.assertEqual(repr(node), f"HtmlNode(tag='p', value=None, children=[{child!r}], props=None)")
+        self.assertIsNone(LeafNode("b", "x").children)
+
+    def test_tags_are_interned(self):
+        tag = "".join(["s", "pan"])
+        self.assertIs(LeafNode(tag, "x").tag, LeafNode("span", "y").tag)
+
+
+class TestStreaming(unittest.TestCase):
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [ParentNode("p", [LeafNode(None, "a "), LeafNode("a", "b", {"href": "/x"})]), LeafNode("hr", "")],
+            {"class": "c"},
+        )
+        chunks = list(node.iter_html())
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), node.to_html())
+
+    def test_iter_html_never_splits_attributes(self):
+        node = ParentNode("p", [LeafNode("a", "x", {"href": "/a"}), LeafNode("img", "", {"src": "/b"})])
+        chunks = list(node.iter_html())
+        self.assertIn('<a href="/a">x</a>', chunks)
+        self.assertIn('<img src="/b"></img>', chunks)
+
+    def test_write_html(self):
+        stream = io.StringIO()
+        node = ParentNode("div", [LeafNode("b", "bold")])
+        node.write_html(stream)
+        self.assertEqual(stream.getvalue(), "<div><b>bold</b></div>")
+
+    def test_iter_html_no_children_raises(self):
+        with self.assertRaises(ValueError):
+            list(ParentNode("div", None).iter_html())
+
+
+class TestResolveUrl(unittest.TestCase):
+    def test_resolver_applies_to_href_and_src_only(self):
+        node = ParentNode(
+            "p",
+            [LeafNode("a", "/x", {"href": "/x", "title": "/x"}), LeafNode("img", "", {"src": "/i.png", "alt": "/i"})],
+        )
+        resolve = lambda url: "/base" + url
+        expected = '<p><a href="/base/x" title="/x">/x</a><img src="/base/i.png" alt="/i"></img></p>'
+        self.assertEqual(node.to_html(resolve), expected)
+        self.assertEqual("".join(node.iter_html(resolve)), expected)
+
+    def test_same_tree_serialises_per_resolver(self):
+        node = LeafNode("a", "home", {"href": "/"})
+        self.assertEqual(node.to_html(lambda url: "/one" + url), '<a href="/one/">home</a>')
+        self.assertEqual(node.to_html(), '<a href="/">home</a>')
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,3 +1,4 @@
+import time
 import unittest
 
 from textnode import TextNode, TextType
@@ -374,18 +375,21 @@ class TestSplitNodesDelimiter(unittest.TestCase):
         new_nodes = split_nodes_delimiter([node], "`", TextType.CODE)
         self.assertEqual(new_nodes, [TextNode("Just plain text", TextType.TEXT)])
 
-    def test_unclosed_delimiter_raises(self):
+    def test_unclosed_delimiter_is_text(self):
         node = TextNode("Text with `unclosed code", TextType.TEXT)
-        with self.assertRaises(ValueError) as ctx:
-            split_nodes_delimiter([node], "`", TextType.CODE)
-        self.assertIn("no matching closing delimiter", str(ctx.exception))
-        self.assertIn("`", str(ctx.exception))
+        new_nodes = split_nodes_delimiter([node], "`", TextType.CODE)
+        self.assertEqual(new_nodes, [TextNode("Text with `unclosed code", TextType.TEXT)])
 
-    def test_unclosed_bold_raises(self):
-        node = TextNode("Start **bold no end", TextType.TEXT)
-        with self.assertRaises(ValueError) as ctx:
-            split_nodes_delimiter([node], "**", TextType.BOLD)
-        self.assertIn("**", str(ctx.exception))
+    def test_unclosed_bold_after_pair_is_text(self):
+        node = TextNode("**a** b **c", TextType.TEXT)
+        new_nodes = split_nodes_delimiter([node], "**", TextType.BOLD)
+        self.assertEqual(
+            new_nodes,
+            [
+                TextNode("a", TextType.BOLD),
+                TextNode(" b **c", TextType.TEXT),
+            ],
+        )
 
     def test_delimiter_at_edges(self):
         node = TextNode("`only code`", TextType.TEXT)
@@ -467,6 +471,35 @@ class TestTextToTextnodes(unittest.TestCase):
             ],
         )
 
+    def test_text_to_textnodes_linked_image_keeps_image(self):
+        self.assertListEqual(
+            text_to_textnodes("[![logo](/images/tom.png)](/blog/tom)"),
+            [
+                TextNode("[", TextType.TEXT),
+                TextNode("logo", TextType.IMAGE, "/images/tom.png"),
+                TextNode("](/blog/tom)", TextType.TEXT),
+            ],
+        )
+
+    def test_text_to_textnodes_image_inside_brackets(self):
+        self.assertListEqual(
+            text_to_textnodes("Icons [see ![icon](/i.png) here] and [a](/a)"),
+            [
+                TextNode("Icons [see ", TextType.TEXT),
+                TextNode("icon", TextType.IMAGE, "/i.png"),
+                TextNode(" here] and ", TextType.TEXT),
+                TextNode("a", TextType.LINK, "/a"),
+            ],
+        )
+
+    def test_text_to_textnodes_image_in_link_url(self):
+        self.assertListEqual(
+            text_to_textnodes("[a](b ![c](d)"),
+            [TextNode("[a](b ", TextType.TEXT), TextNode("c", TextType.IMAGE, "d")],
+        )
+        # An "![" that can't close doesn't stop the link.
+        self.assertListEqual(text_to_textnodes("[a](b![c)"), [TextNode("a", TextType.LINK, "b![c")])
+
     def test_text_to_textnodes_code_and_italic(self):
         text = "Use `code` and _italic_ together"
         nodes = text_to_textnodes(text)
@@ -485,6 +518,111 @@ class TestTextToTextnodes(unittest.TestCase):
         nodes = text_to_textnodes("")
         self.assertListEqual(nodes, [])
 
+    def test_text_to_textnodes_many_links(self):
+        text = " ".join(f"[l{i}](https://x.com/{i})" for i in range(500))
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 999)
+        self.assertEqual(nodes[-1], TextNode("l499", TextType.LINK, "https://x.com/499"))
+
+    def test_text_to_textnodes_link_text_kept_verbatim(self):
+        nodes = text_to_textnodes("See [**bold** link](https://a.com)")
+        self.assertListEqual(
+            nodes,
+            [
+                TextNode("See ", TextType.TEXT),
+                TextNode("**bold** link", TextType.LINK, "https://a.com"),
+            ],
+        )
+
+    def test_text_to_textnodes_underscore_inside_bold_is_literal(self):
+        nodes = text_to_textnodes("**snake_case** name")
+        self.assertListEqual(
+            nodes,
+            [
+                TextNode("snake_case", TextType.BOLD),
+                TextNode(" name", TextType.TEXT),
+            ],
+        )
+
+    def test_text_to_textnodes_code_is_literal(self):
+        nodes = text_to_textnodes("`a **b** [c](d)`")
+        self.assertListEqual(nodes, [TextNode("a **b** [c](d)", TextType.CODE)])
+
+    def test_text_to_textnodes_nested_emphasis(self):
+        nodes = text_to_textnodes("_a **b** c_")
+        self.assertListEqual(
+            nodes,
+            [
+                TextNode("a ", TextType.ITALIC),
+                TextNode("b", TextType.BOLD),
+                TextNode(" c", TextType.ITALIC),
+            ],
+        )
+
+    def test_text_to_textnodes_unmatched_brackets_are_text(self):
+        nodes = text_to_textnodes("[not a link] and ![nor](an image")
+        self.assertListEqual(nodes, [TextNode("[not a link] and ![nor](an image", TextType.TEXT)])
+
+    def test_text_to_textnodes_unclosed_delimiters_are_text(self):
+        nodes = text_to_textnodes("Start **bold no end, snake_case and `tick")
+        self.assertListEqual(nodes, [TextNode("Start **bold no end, snake_case and `tick", TextType.TEXT)])
+
+    def test_text_to_textnodes_unclosed_inside_emphasis(self):
+        nodes = text_to_textnodes("_a **b_ c")
+        self.assertListEqual(
+            nodes,
+            [
+                TextNode("a **b", TextType.ITALIC),
+                TextNode(" c", TextType.TEXT),
+            ],
+        )
+
+
+class TestPathologicalInput(unittest.TestCase):
+    """
+    Inputs that make backtracking or rescanning parsers quadratic. Each must finish well
+    inside its budget; a quadratic scan of 100k characters takes minutes.
+    """
+
+    N = 100_000
+    BUDGET = 2.0  # seconds
+
+    def assertFast(self, func, text):
+        start = time.perf_counter()
+        result = func(text)
+        self.assertLess(time.perf_counter() - start, self.BUDGET)
+        return result
+
+    def test_open_brackets(self):
+        for text in ("[" * self.N, "![" * self.N, "[a](" * self.N, "]([" * self.N):
+            with self.subTest(text=text[:8]):
+                self.assertFast(extract_markdown_links, text)
+                self.assertFast(extract_markdown_images, text)
+                self.assertFast(split_nodes_link, [TextNode(text, TextType.TEXT)])
+                self.assertFast(split_nodes_image, [TextNode(text, TextType.TEXT)])
+                self.assertEqual("".join(n.text for n in self.assertFast(text_to_textnodes, text)), text)
+
+    def test_brackets_without_closer_on_line(self):
+        text = "[x " * self.N + "\n](y)"
+        self.assertEqual(self.assertFast(extract_markdown_links, text), [])
+
+    def test_many_links(self):
+        text = "[a](b) " * (self.N // 7)
+        self.assertEqual(len(self.assertFast(extract_markdown_links, text)), self.N // 7)
+        self.assertEqual(len(self.assertFast(split_nodes_link, [TextNode(text, TextType.TEXT)])), 2 * (self.N // 7))
+
+    def test_repeated_delimiters(self):
+        for text in ("**" * self.N + "*", "_" * self.N + "*", "_**" * self.N, "`" * self.N + "x`", "**_" * self.N + "a"):
+            with self.subTest(text=text[:8]):
+                nodes = self.assertFast(text_to_textnodes, text)
+                self.assertTrue(all(node.text for node in nodes))
+
+    def test_unclosed_openers(self):
+        text = "**a _b `c " + "[d ![e ](f " * (self.N // 10)
+        nodes = self.assertFast(text_to_textnodes, text)
+        self.assertEqual(len(nodes), 1)
+        self.assertEqual(nodes[0].text, text)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,135 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+import main
+from main import _batch_pages, generate_pages_recursive, generate_targets, parse_args
+from markdown_to_html import configure_inline_cache, inline_cache_info
+from render_cache import RenderCache
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+class TestParseArgs(unittest.TestCase):
+    def test_defaults(self):
+        args = parse_args([])
+        self.assertEqual(args.basepath, "/")
+        self.assertEqual(args.jobs, 1)
+
+    def test_basepath_and_jobs(self):
+        args = parse_args(["/site_generator/", "--jobs", "4"])
+        self.assertEqual(args.basepath, "/site_generator/")
+        self.assertEqual(args.jobs, 4)
+
+    def test_targets(self):
+        args = parse_args(["--target", "/:./docs", "--target", "/preview/:out/preview"])
+        self.assertEqual(args.targets, [("/", "./docs"), ("/preview/", "out/preview")])
+        self.assertIsNone(parse_args([]).targets)
+
+    def test_bad_target(self):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            parse_args(["--target", "docs"])
+
+    def test_basepath_with_targets(self):
+        with contextlib.redirect_stderr(io.StringIO()) as err, self.assertRaises(SystemExit):
+            parse_args(["/site_generator/", "--target", "/:./x"])
+        self.assertIn("--target", err.getvalue())
+
+    def test_duplicate_target_outdirs(self):
+        with contextlib.redirect_stderr(io.StringIO()) as err, self.assertRaises(SystemExit):
+            parse_args(["--target", "/:docs", "--target", "/preview/:./docs/"])
+        self.assertIn("same directory", err.getvalue())
+
+    def test_watch_refuses_fingerprint(self):
+        with contextlib.redirect_stderr(io.StringIO()) as err, self.assertRaises(SystemExit):
+            parse_args(["--watch", "--fingerprint"])
+        self.assertIn("--fingerprint", err.getvalue())
+
+
+class TestParallelGeneration(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        self.content = root / "content"
+        self.template = root / "template.html"
+        self.content.mkdir()
+        for i in range(12):
+            (self.content / f"post{i:02}.md").write_text(
+                f"# Post {i}\n\nSome **text** for post {i}.", encoding="utf-8"
+            )
+        self.template.write_text(TEMPLATE, encoding="utf-8")
+        self.root = root
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def read_tree(self, path):
+        return {p.name: p.read_text(encoding="utf-8") for p in sorted(path.rglob("*.html"))}
+
+    def test_parallel_matches_serial(self):
+        serial = self.root / "serial"
+        parallel = self.root / "parallel"
+        generate_pages_recursive(str(self.content), str(self.template), str(serial), "/")
+        generated = generate_pages_recursive(
+            str(self.content), str(self.template), str(parallel), "/", jobs=3
+        )
+        self.assertEqual(len(generated), 12)
+        self.assertEqual(self.read_tree(serial), self.read_tree(parallel))
+
+    def test_render_cache_serves_a_fresh_checkout(self):
+        cache_dir = self.root / "cache"
+        first = RenderCache(cache_dir)
+        generate_pages_recursive(str(self.content), str(self.template), str(self.root / "a"), "/", render_cache=first)
+        self.assertEqual((first.hits, first.misses), (0, 12))
+        # No docs/ and no manifest from the first build, only the cache directory.
+        second = RenderCache(cache_dir)
+        generate_pages_recursive(
+            str(self.content), str(self.template), str(self.root / "b"), "/", jobs=3, render_cache=second
+        )
+        self.assertEqual((second.hits, second.misses), (12, 0))
+        self.assertEqual(self.read_tree(self.root / "a"), self.read_tree(self.root / "b"))
+        # A different basepath is a different page.
+        third = RenderCache(cache_dir)
+        generate_pages_recursive(str(self.content), str(self.template), str(self.root / "c"), "/r/", render_cache=third)
+        self.assertEqual(third.misses, 12)
+
+    def test_targets_share_one_parse(self):
+        original = inline_cache_info().maxsize
+        # With the cache off, every parse shows up as inline cache misses.
+        configure_inline_cache(0)
+        try:
+            misses = inline_cache_info().misses
+            generate_pages_recursive(str(self.content), str(self.template), str(self.root / "single"), "/r/")
+            single = inline_cache_info().misses - misses
+            misses = inline_cache_info().misses
+            generated = generate_targets(
+                str(self.content),
+                str(self.template),
+                [(str(self.root / "a"), "/", None), (str(self.root / "b"), "/r/", None)],
+            )
+            self.assertEqual(inline_cache_info().misses - misses, single)
+        finally:
+            configure_inline_cache(original)
+        self.assertEqual([len(pages) for pages in generated], [12, 12])
+        self.assertEqual(self.read_tree(self.root / "b"), self.read_tree(self.root / "single"))
+
+    def test_batches_keep_page_order(self):
+        pages = [(str(p), "t", "d", "/") for p in sorted(self.content.glob("*.md"))]
+        batches = _batch_pages(pages, 4)
+        self.assertGreaterEqual(len(batches), 4)
+        self.assertEqual([args for batch in batches for args in batch], pages)
+
+    def test_small_batch_limit_splits_every_page(self):
+        pages = [(str(p), "t", "d", "/") for p in sorted(self.content.glob("*.md"))]
+        original = main.batch_bytes
+        main.batch_bytes = 1
+        try:
+            self.assertEqual(len(_batch_pages(pages, 2)), len(pages))
+        finally:
+            main.batch_bytes = original
+
+
+if __name__ == "__main__":
+    unittest.main()
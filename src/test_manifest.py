@@ -0,0 +1,93 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from main import generate_pages_recursive
+from manifest import BuildManifest, page_fingerprint
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_load_missing_is_empty(self):
+        manifest = BuildManifest.load(self.root / "nowhere")
+        self.assertEqual(manifest.entries, {})
+
+    def test_load_corrupt_is_empty(self):
+        (self.root / ".build-manifest.json").write_text("{not json", encoding="utf-8")
+        self.assertEqual(BuildManifest.load(self.root).entries, {})
+
+    def test_round_trip(self):
+        dest = self.root / "a" / "index.html"
+        dest.parent.mkdir()
+        dest.write_text("x", encoding="utf-8")
+        fingerprint = page_fingerprint("s", "t", "/")
+        manifest = BuildManifest(self.root)
+        manifest.record(dest, fingerprint)
+        manifest.save()
+        loaded = BuildManifest.load(self.root)
+        self.assertTrue(loaded.is_fresh(dest, fingerprint))
+        self.assertFalse(loaded.is_fresh(dest, page_fingerprint("s", "t", "/repo/")))
+
+    def test_missing_output_is_not_fresh(self):
+        fingerprint = page_fingerprint("s", "t", "/")
+        manifest = BuildManifest(self.root)
+        manifest.record(self.root / "gone.html", fingerprint)
+        self.assertFalse(manifest.is_fresh(self.root / "gone.html", fingerprint))
+
+
+class TestIncrementalBuild(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        self.content = root / "content"
+        self.docs = root / "docs"
+        self.template = root / "template.html"
+        (self.content / "blog").mkdir(parents=True)
+        (self.content / "index.md").write_text("# Home", encoding="utf-8")
+        (self.content / "blog" / "post.md").write_text("# Post", encoding="utf-8")
+        self.template.write_text(TEMPLATE, encoding="utf-8")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def build(self, basepath="/"):
+        manifest = BuildManifest.load(self.docs)
+        generated = generate_pages_recursive(
+            str(self.content), str(self.template), str(self.docs), basepath, manifest
+        )
+        manifest.save()
+        return sorted(p.relative_to(self.docs).as_posix() for p in generated)
+
+    def test_second_build_skips_everything(self):
+        self.assertEqual(self.build(), ["blog/post.html", "index.html"])
+        self.assertEqual(self.build(), [])
+
+    def test_only_changed_page_is_rebuilt(self):
+        self.build()
+        (self.content / "blog" / "post.md").write_text("# Post, edited", encoding="utf-8")
+        self.assertEqual(self.build(), ["blog/post.html"])
+
+    def test_template_or_basepath_change_rebuilds_all(self):
+        self.build()
+        self.template.write_text(TEMPLATE + "\n", encoding="utf-8")
+        self.assertEqual(self.build(), ["blog/post.html", "index.html"])
+        self.assertEqual(self.build("/repo/"), ["blog/post.html", "index.html"])
+
+    def test_deleted_source_removes_output(self):
+        self.build()
+        (self.content / "blog" / "post.md").unlink()
+        self.build()
+        self.assertFalse((self.docs / "blog").exists())
+        self.assertTrue((self.docs / "index.html").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
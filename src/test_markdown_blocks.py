@@ -1,6 +1,8 @@
+import os
+import tempfile
 import unittest
 
-from markdown_blocks import markdown_to_blocks
+from markdown_blocks import iter_blocks, markdown_to_blocks, read_blocks
 
 
 class TestMarkdownToBlocks(unittest.TestCase):
@@ -40,6 +42,36 @@ This is a paragraph of text. It has some **bold** and _italic_ words inside of i
         self.assertListEqual(markdown_to_blocks(""), [])
         self.assertListEqual(markdown_to_blocks("   \n\n   \n\n   "), [])
 
+    def test_markdown_to_blocks_crlf(self):
+        markdown = "# Title\r\n\r\npara line one\r\nline two\r\n"
+        self.assertListEqual(markdown_to_blocks(markdown), ["# Title", "para line one\nline two"])
+
+    def test_markdown_to_blocks_whitespace_only_line_separates(self):
+        markdown = "first\n   \t\nsecond"
+        self.assertListEqual(markdown_to_blocks(markdown), ["first", "second"])
+
+
+class TestIterBlocks(unittest.TestCase):
+    def test_matches_markdown_to_blocks(self):
+        markdown = "  # Heading\r\n \n\n- a\n- b  \n\t\n\ntext\nmore\n"
+        self.assertListEqual(list(iter_blocks(markdown.split("\n"))), markdown_to_blocks(markdown))
+
+    def test_is_lazy(self):
+        def lines():
+            yield "one"
+            yield ""
+            raise AssertionError("read past the first block")
+
+        self.assertEqual(next(iter_blocks(lines())), "one")
+
+    def test_read_blocks(self):
+        with tempfile.NamedTemporaryFile("wb", suffix=".md", delete=False) as f:
+            f.write(b"# T\r\n\r\nbody\r\n")
+        try:
+            self.assertListEqual(list(read_blocks(f.name)), ["# T", "body"])
+        finally:
+            os.unlink(f.name)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,12 @@
 import unittest
 
-from markdown_to_html import markdown_to_html_node
+from markdown_to_html import (
+    Heading,
+    configure_inline_cache,
+    inline_cache_info,
+    markdown_to_document,
+    markdown_to_html_node,
+)
 
 
 class TestMarkdownToHtmlNode(unittest.TestCase):
@@ -76,6 +82,21 @@ the **same** even with inline stuff
             "<div><ol><li>first</li><li>second</li><li>third</li></ol></div>",
         )
 
+    def test_link_with_inline_markup(self):
+        md = "A [**bold** link](https://a.com) and [plain](https://b.com)"
+        node = markdown_to_html_node(md)
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            '<div><p>A <a href="https://a.com"><b>bold</b> link</a> and <a href="https://b.com">plain</a></p></div>',
+        )
+
+    def test_link_with_unbalanced_underscore(self):
+        md = "[snake_case](https://a.com)"
+        node = markdown_to_html_node(md)
+        html = node.to_html()
+        self.assertEqual(html, '<div><p><a href="https://a.com">snake_case</a></p></div>')
+
     def test_empty_document(self):
         node = markdown_to_html_node("")
         html = node.to_html()
@@ -91,5 +112,57 @@ the **same** even with inline stuff
         )
 
 
+class TestInlineCache(unittest.TestCase):
+    def tearDown(self):
+        configure_inline_cache(4096)
+
+    def test_repeated_fragments_hit_the_cache(self):
+        configure_inline_cache(16)
+        md = "- **shared** footer\n- **shared** footer\n- other"
+        first = markdown_to_html_node(md).to_html()
+        info = inline_cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 2))
+        self.assertEqual(markdown_to_html_node(md).to_html(), first)
+        self.assertEqual(inline_cache_info().hits, 4)
+
+    def test_cache_is_bounded(self):
+        configure_inline_cache(2)
+        markdown_to_html_node("\n\n".join(f"paragraph {i}" for i in range(10)))
+        self.assertEqual(inline_cache_info().currsize, 2)
+
+    def test_disabled_cache_gives_same_html(self):
+        md = "Some _text_ with [a link](/x)\n\nSome _text_ with [a link](/x)"
+        cached = markdown_to_html_node(md).to_html()
+        configure_inline_cache(0)
+        self.assertEqual(markdown_to_html_node(md).to_html(), cached)
+        self.assertEqual(inline_cache_info().hits, 0)
+
+
+class TestMarkdownToDocument(unittest.TestCase):
+    def test_title_and_outline(self):
+        md = "## Before\n\n# The **Title**\n\ntext\n\n### Part\n\n# Another"
+        document = markdown_to_document(md)
+        self.assertEqual(document.title, "The **Title**")
+        self.assertEqual(
+            document.headings,
+            [Heading(2, "Before"), Heading(1, "The **Title**"), Heading(3, "Part"), Heading(1, "Another")],
+        )
+        self.assertEqual(document.node.to_html(), markdown_to_html_node(md).to_html())
+
+    def test_links_and_images(self):
+        md = (
+            "# T\n\n[a](/a) and ![i](/i.png) and [**b**](/b) and [a again](/a)\n\n"
+            "- `[code](/code)` item [c](/c)\n\n```\n[block](/block)\n```"
+        )
+        document = markdown_to_document(md)
+        self.assertEqual(document.links, ("/a", "/b", "/c"))
+        self.assertEqual(document.images, ("/i.png",))
+
+    def test_h1_in_code_block_is_not_a_title(self):
+        document = markdown_to_document("```\n# not a title\n```\n\n## Sub")
+        self.assertIsNone(document.title)
+        self.assertEqual(document.headings, [Heading(2, "Sub")])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,88 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+import gencontent
+from main import generate_pages_recursive, generate_targets
+from pipeline import Pipeline
+from render_cache import RenderCache
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.content = self.root / "content"
+        (self.content / "blog").mkdir(parents=True)
+        for i in range(10):
+            (self.content / "blog" / f"post{i}.md").write_text(
+                f"# Post {i}\n\nSome **text** and [a link](/x) for post {i}.", encoding="utf-8"
+            )
+        self.template = self.root / "template.html"
+        self.template.write_text(TEMPLATE, encoding="utf-8")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def read_tree(self, path):
+        return {p.relative_to(path): p.read_text(encoding="utf-8") for p in sorted(path.rglob("*.html"))}
+
+    def build(self, dest, pipeline=None):
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            generated = generate_pages_recursive(
+                str(self.content), str(self.template), str(self.root / dest), "/repo/", pipeline=pipeline
+            )
+        return generated, log.getvalue()
+
+    def test_matches_sequential_build(self):
+        expected, expected_log = self.build("serial")
+        generated, log = self.build("piped", Pipeline(io_workers=3, queue_depth=1))
+        self.assertEqual([p.name for p in generated], [p.name for p in expected])
+        self.assertEqual(self.read_tree(self.root / "piped"), self.read_tree(self.root / "serial"))
+        # Same log lines in the same order; the inline cache counts differ as it is warm by now.
+        pages_log = lambda text: [line for line in text.splitlines() if line.startswith("Generating")]
+        self.assertEqual(pages_log(log.replace("piped", "serial")), pages_log(expected_log))
+
+    def test_targets(self):
+        self.build("serial")
+        targets = [(str(self.root / "piped"), "/repo/", None), (str(self.root / "root"), "/", None)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            generated = generate_targets(
+                str(self.content), str(self.template), targets, pipeline=Pipeline(jobs=2)
+            )
+        self.assertEqual([len(pages) for pages in generated], [10, 10])
+        self.assertEqual(self.read_tree(self.root / "piped"), self.read_tree(self.root / "serial"))
+        self.assertIn('href="/x"', (self.root / "root" / "blog" / "post0.html").read_text(encoding="utf-8"))
+
+    def test_render_cache(self):
+        cache = RenderCache(self.root / "cache")
+        self.build("a", Pipeline(render_cache=cache))
+        self.assertEqual((cache.hits, cache.misses), (0, 10))
+        cache = RenderCache(self.root / "cache")
+        self.build("b", Pipeline(render_cache=cache))
+        self.assertEqual((cache.hits, cache.misses), (10, 0))
+        self.assertEqual(self.read_tree(self.root / "a"), self.read_tree(self.root / "b"))
+
+    def test_streamed_pages(self):
+        original = gencontent.stream_threshold
+        gencontent.stream_threshold = 10
+        try:
+            self.build("streamed", Pipeline())
+        finally:
+            gencontent.stream_threshold = original
+        self.build("whole", Pipeline())
+        self.assertEqual(self.read_tree(self.root / "streamed"), self.read_tree(self.root / "whole"))
+
+    def test_error_stops_the_pipeline(self):
+        (self.content / "blog" / "post5.md").write_text("no title here", encoding="utf-8")
+        with self.assertRaises(ValueError):
+            self.build("broken", Pipeline(queue_depth=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
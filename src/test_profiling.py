@@ -0,0 +1,61 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+import profiling
+from gencontent import generate_page
+
+STAGES = {"read", "block_split", "classify", "inline", "serialise", "template", "write"}
+
+
+class TestProfiling(unittest.TestCase):
+    def tearDown(self):
+        profiling.disable()
+        profiling.take()
+
+    def test_disabled_records_nothing(self):
+        with profiling.page("p"), profiling.stage("s"):
+            pass
+        self.assertEqual(profiling.take(), {})
+
+    def test_stages_accumulate_per_page(self):
+        profiling.enable()
+        with profiling.page("p"):
+            for _ in range(3):
+                with profiling.stage("s"):
+                    pass
+        records = profiling.take()
+        self.assertEqual(list(records), ["p"])
+        self.assertEqual(list(records["p"]), ["s"])
+        self.assertGreaterEqual(records["p"]["s"][0], 0.0)
+
+    def test_merge_and_report(self):
+        profiling.merge({"a": {"s": [1.0, 5]}, "b": {"s": [2.0, 1], "t": [0.5, 0]}})
+        profiling.merge({"a": {"s": [1.0, 5]}})
+        report = profiling.report()
+        self.assertEqual(report["pages"]["a"]["seconds"], 2.0)
+        self.assertEqual(report["stages"]["s"], {"seconds": 4.0, "allocated_blocks": 11})
+        summary = profiling.summary(report, top=1)
+        self.assertIn("b  (mostly s)", summary)
+        self.assertNotIn(" a ", summary)
+
+    def test_generate_page_records_every_stage(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "t.html").write_text('<a href="/">{{ Title }}</a>{{ Content }}', encoding="utf-8")
+            (root / "p.md").write_text("# T\n\nSome **text**.", encoding="utf-8")
+            profiling.enable()
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_page(str(root / "p.md"), str(root / "t.html"), str(root / "out.html"), "/repo/")
+            records = profiling.take()
+            self.assertEqual(set(records[str(root / "p.md")]), STAGES)
+            self.assertEqual(
+                (root / "out.html").read_text(encoding="utf-8"),
+                '<a href="/repo/">T</a><div><h1>T</h1><p>Some <b>text</b>.</p></div>',
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
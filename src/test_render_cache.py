@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from render_cache import RenderCache, cache_key
+
+
+class TestCacheKey(unittest.TestCase):
+    def test_every_input_changes_the_key(self):
+        key = cache_key("src", "tpl", "/")
+        self.assertEqual(key, cache_key("src", "tpl", "/"))
+        self.assertNotEqual(key, cache_key("src2", "tpl", "/"))
+        self.assertNotEqual(key, cache_key("src", "tpl2", "/"))
+        self.assertNotEqual(key, cache_key("src", "tpl", "/repo/"))
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.cache = RenderCache(self.root / "cache", max_bytes=100)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def page(self, name, text):
+        path = self.root / name
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    def test_miss_then_hit(self):
+        dest = self.root / "out" / "a.html"
+        self.assertFalse(self.cache.fetch("ab12", dest))
+        self.cache.store("ab12", self.page("a.html", "<p>a</p>"))
+        self.assertTrue(self.cache.fetch("ab12", dest))
+        self.assertEqual(dest.read_text(encoding="utf-8"), "<p>a</p>")
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_prune_evicts_least_recently_used(self):
+        for i, key in enumerate(("aa", "bb", "cc")):
+            self.cache.store(key, self.page(f"{key}.html", "x" * 40))
+            entry = self.root / "cache" / key[:2] / f"{key}.html"
+            os.utime(entry, ns=(i * 10**9, i * 10**9))
+        # A hit makes "aa" the most recently used entry.
+        self.cache.fetch("aa", self.root / "out.html")
+        removed = self.cache.prune()
+        self.assertEqual([p.name for p in removed], ["bb.html"])
+        self.assertTrue(self.cache.fetch("aa", self.root / "out.html"))
+        self.assertTrue(self.cache.fetch("cc", self.root / "out.html"))
+
+    def test_prune_empty_cache(self):
+        self.assertEqual(self.cache.prune(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
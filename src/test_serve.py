@@ -0,0 +1,217 @@
+import gzip
+import http.client
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from pathlib import Path
+
+from compress import gzip_file
+from serve import FileCache, accepts_gzip, make_server
+
+PAGE = "<p>" + "repetitive text " * 200 + "</p>"
+
+
+class TestServe(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.cache = FileCache(self.root, max_file_size=4096)
+        self.server = make_server(self.root, "127.0.0.1", 0, self.cache)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        self.conn = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=5)
+
+    def tearDown(self):
+        self.conn.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self._tmp.cleanup()
+
+    def write(self, rel, data, mtime=None):
+        path = self.root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data if isinstance(data, bytes) else data.encode("utf-8"))
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def get(self, path, **headers):
+        self.conn.request("GET", path, headers=headers)
+        response = self.conn.getresponse()
+        return response, response.read()
+
+    def test_serves_index_with_validators(self):
+        self.write("index.html", PAGE)
+        response, body = self.get("/")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body.decode("utf-8"), PAGE)
+        self.assertEqual(response.getheader("Content-Type"), "text/html; charset=utf-8")
+        self.assertTrue(response.getheader("ETag").startswith('"'))
+        self.assertIsNotNone(response.getheader("Last-Modified"))
+
+    def test_keep_alive(self):
+        self.write("a.html", "a")
+        self.write("b.html", "b")
+        self.assertEqual(self.get("/a.html")[1], b"a")
+        sock = self.conn.sock
+        self.assertEqual(self.get("/b.html")[1], b"b")
+        self.assertIs(self.conn.sock, sock)
+
+    def test_if_none_match(self):
+        self.write("index.html", PAGE)
+        response, _ = self.get("/index.html")
+        etag = response.getheader("ETag")
+        response, body = self.get("/index.html", **{"If-None-Match": etag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(body, b"")
+        self.assertEqual(response.getheader("ETag"), etag)
+        response, _ = self.get("/index.html", **{"If-None-Match": '"other"'})
+        self.assertEqual(response.status, 200)
+
+    def test_if_modified_since(self):
+        self.write("index.html", PAGE, mtime=1_000_000_000)
+        response, _ = self.get("/index.html")
+        last_modified = response.getheader("Last-Modified")
+        response, _ = self.get("/index.html", **{"If-Modified-Since": last_modified})
+        self.assertEqual(response.status, 304)
+        response, _ = self.get("/index.html", **{"If-Modified-Since": "Sat, 01 Jan 2000 00:00:00 GMT"})
+        self.assertEqual(response.status, 200)
+
+    def test_precompressed_sibling(self):
+        gzip_file(self.write("index.html", PAGE))
+        response, body = self.get("/index.html", **{"Accept-Encoding": "gzip, deflate"})
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(response.getheader("Vary"), "Accept-Encoding")
+        self.assertEqual(gzip.decompress(body).decode("utf-8"), PAGE)
+        response, body = self.get("/index.html")
+        self.assertIsNone(response.getheader("Content-Encoding"))
+        self.assertEqual(body.decode("utf-8"), PAGE)
+
+    def test_gzip_refused_with_zero_quality(self):
+        gzip_file(self.write("index.html", PAGE))
+        response, body = self.get("/index.html", **{"Accept-Encoding": "gzip;q=0, deflate"})
+        self.assertIsNone(response.getheader("Content-Encoding"))
+        self.assertEqual(body.decode("utf-8"), PAGE)
+
+    def test_stale_sibling_is_ignored(self):
+        gzip_file(self.write("index.html", PAGE))
+        self.write("index.html", "<p>new</p>", mtime=1_000_000_000)
+        response, body = self.get("/index.html", **{"Accept-Encoding": "gzip"})
+        self.assertIsNone(response.getheader("Content-Encoding"))
+        self.assertEqual(body, b"<p>new</p>")
+
+    def test_changed_file_is_reloaded(self):
+        self.write("index.html", "old", mtime=1_000_000_000)
+        self.write("other.html", "other")
+        _, body = self.get("/index.html")
+        self.get("/other.html")
+        other = self.cache.get(self.root.resolve() / "other.html")
+        self.write("index.html", "new", mtime=1_000_000_001)
+        response, body = self.get("/index.html")
+        self.assertEqual(body, b"new")
+        self.assertIs(self.cache.get(self.root.resolve() / "other.html"), other)
+
+    def test_large_file_uses_sendfile_path(self):
+        data = os.urandom(20000)
+        self.write("big.bin", data)
+        response, body = self.get("/big.bin")
+        self.assertEqual(body, data)
+        self.assertIsNone(self.cache.get(self.root.resolve() / "big.bin").data)
+
+    def test_sendfile_failure_resumes_where_it_stopped(self):
+        data = os.urandom(20000)
+        self.write("big.bin", data)
+        real_sendfile = os.sendfile
+        calls = []
+
+        def flaky_sendfile(out_fd, in_fd, offset, count):
+            calls.append(offset)
+            if len(calls) > 1:
+                raise OSError("sendfile failed")
+            return real_sendfile(out_fd, in_fd, offset, min(count, 5000))
+
+        with mock.patch("serve.os.sendfile", flaky_sendfile):
+            response, body = self.get("/big.bin")
+        self.assertEqual(body, data)
+        self.assertEqual(calls, [0, 5000])
+        # The connection is still in step: the next response is parsed correctly.
+        self.write("small.html", "small")
+        self.assertEqual(self.get("/small.html")[1], b"small")
+
+    def test_head(self):
+        self.write("index.html", PAGE)
+        self.conn.request("HEAD", "/index.html")
+        response = self.conn.getresponse()
+        self.assertEqual(response.read(), b"")
+        self.assertEqual(response.getheader("Content-Length"), str(len(PAGE)))
+
+    def test_directory_redirect(self):
+        self.write("blog/index.html", "blog")
+        response, _ = self.get("/blog")
+        self.assertEqual(response.status, 301)
+        self.assertEqual(response.getheader("Location"), "/blog/")
+        self.assertEqual(self.get("/blog/")[1], b"blog")
+
+    def test_not_found(self):
+        self.write(".build-manifest.json", "{}")
+        self.assertEqual(self.get("/missing.html")[0].status, 404)
+        self.assertEqual(self.get("/.build-manifest.json")[0].status, 404)
+        self.assertEqual(self.get("/../etc/passwd")[0].status, 404)
+
+    def test_nul_byte_is_a_bad_request(self):
+        response, _ = self.get("/%00")
+        self.assertEqual(response.status, 400)
+        self.write("index.html", "still up")
+        self.assertEqual(self.get("/")[1], b"still up")
+
+    def test_fingerprinted_assets_are_immutable(self):
+        self.write("style.0123abcd.css", "body{}")
+        response, _ = self.get("/style.0123abcd.css")
+        self.assertIn("immutable", response.getheader("Cache-Control"))
+
+
+class TestFileCache(unittest.TestCase):
+    def test_open_file_matches_entry_after_replace(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            path = root / "big.bin"
+            path.write_bytes(b"a" * 200)
+            cache = FileCache(root, max_file_size=100)
+            entry, f = cache.open(path)
+            with f:
+                # A rebuild renames a new file into place between lookup and send.
+                (root / "new.bin").write_bytes(b"b" * 300)
+                os.replace(root / "new.bin", path)
+                self.assertEqual(f.read(), b"a" * entry.size)
+            self.assertEqual(cache.get(path).size, 300)
+
+
+    def test_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            for name in "abc":
+                (root / name).write_bytes(b"x" * 100)
+            cache = FileCache(root, max_file_size=100, max_bytes=250)
+            a = cache.get(root / "a")
+            cache.get(root / "b")
+            self.assertIs(cache.get(root / "a"), a)
+            cache.get(root / "c")
+            self.assertIs(cache.get(root / "a"), a)
+            self.assertNotIn(root / "b", cache._entries)
+
+
+class TestAcceptsGzip(unittest.TestCase):
+    def test_quality_values(self):
+        self.assertTrue(accepts_gzip("gzip, deflate, br"))
+        self.assertTrue(accepts_gzip("deflate;q=1, gzip;q=0.5"))
+        self.assertTrue(accepts_gzip("*"))
+        self.assertFalse(accepts_gzip("gzip;q=0"))
+        self.assertFalse(accepts_gzip("*;q=0.5, gzip;q=0"))
+        self.assertFalse(accepts_gzip("deflate"))
+        self.assertFalse(accepts_gzip(""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+
+import staging
+from copy_static import sync_file
+
+
+class TestStaging(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.live = self.root / "docs"
+        (self.live / "blog").mkdir(parents=True)
+        (self.live / "index.html").write_text("home", encoding="utf-8")
+        (self.live / "blog" / "a.html").write_text("a", encoding="utf-8")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_live_is_untouched_until_commit(self):
+        staged = staging.begin(self.live)
+        self.assertEqual((staged / "blog" / "a.html").read_text(encoding="utf-8"), "a")
+        staging.write_if_changed(staged / "index.html", ["new home"])
+        staging.write_if_changed(staged / "new.html", ["new"])
+        self.assertEqual((self.live / "index.html").read_text(encoding="utf-8"), "home")
+        self.assertFalse((self.live / "new.html").exists())
+        staging.commit(staged, self.live)
+        self.assertEqual((self.live / "index.html").read_text(encoding="utf-8"), "new home")
+        self.assertTrue((self.live / "new.html").is_file())
+        self.assertFalse(staged.exists())
+        self.assertEqual(sorted(p.name for p in self.root.iterdir()), ["docs"])
+
+    def test_commit_without_exchange_falls_back_to_renames(self):
+        staged = staging.begin(self.live)
+        staging.write_if_changed(staged / "index.html", ["new home"])
+        with mock.patch("staging._renameat2", None):
+            staging.commit(staged, self.live)
+        self.assertEqual((self.live / "index.html").read_text(encoding="utf-8"), "new home")
+        self.assertEqual(sorted(p.name for p in self.root.iterdir()), ["docs"])
+
+    @unittest.skipIf(staging._renameat2 is None, "no renameat2 on this platform")
+    def test_exchange_swaps_directories(self):
+        other = self.root / "other"
+        other.mkdir()
+        (other / "marker").write_text("other", encoding="utf-8")
+        if not staging.exchange(other, self.live):
+            self.skipTest("filesystem without RENAME_EXCHANGE")
+        self.assertEqual((self.live / "marker").read_text(encoding="utf-8"), "other")
+        self.assertEqual((other / "index.html").read_text(encoding="utf-8"), "home")
+
+    def test_abort_discards_staging(self):
+        staged = staging.begin(self.live)
+        staging.write_if_changed(staged / "index.html", ["broken"])
+        staging.abort(staged)
+        self.assertFalse(staged.exists())
+        self.assertEqual((self.live / "index.html").read_text(encoding="utf-8"), "home")
+
+    def test_begin_without_live_directory(self):
+        staged = staging.begin(self.root / "missing")
+        self.assertEqual(list(staged.iterdir()), [])
+
+    def test_synced_static_file_does_not_write_through_hardlink(self):
+        src = self.root / "style.css"
+        src.write_text("new", encoding="utf-8")
+        (self.live / "style.css").write_text("old!", encoding="utf-8")
+        staged = staging.begin(self.live)
+        sync_file(src, staged / "style.css")
+        self.assertEqual((self.live / "style.css").read_text(encoding="utf-8"), "old!")
+        self.assertEqual((staged / "style.css").read_text(encoding="utf-8"), "new")
+
+
+class TestWriteIfChanged(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dest = Path(self._tmp.name) / "out" / "page.html"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_identical_content_keeps_mtime(self):
+        self.assertTrue(staging.write_if_changed(self.dest, ["<p>", "x</p>"]))
+        os.utime(self.dest, ns=(10**9, 10**9))
+        self.assertFalse(staging.write_if_changed(self.dest, ["<p>x</p>"]))
+        self.assertEqual(self.dest.stat().st_mtime_ns, 10**9)
+        self.assertTrue(staging.write_if_changed(self.dest, ["<p>y</p>"]))
+        self.assertNotEqual(self.dest.stat().st_mtime_ns, 10**9)
+        self.assertEqual(self.dest.read_text(encoding="utf-8"), "<p>y</p>")
+        self.assertEqual(list(self.dest.parent.iterdir()), [self.dest])
+
+    def test_new_file_mode_follows_umask(self):
+        umask = os.umask(0)
+        os.umask(umask)
+        staging.write_if_changed(self.dest, ["<p>x</p>"])
+        self.assertEqual(self.dest.stat().st_mode & 0o777, 0o666 & ~umask)
+
+    def test_replaced_file_keeps_its_mode(self):
+        staging.write_if_changed(self.dest, ["<p>x</p>"])
+        os.chmod(self.dest, 0o640)
+        staging.write_if_changed(self.dest, ["<p>y</p>"])
+        self.assertEqual(self.dest.stat().st_mode & 0o777, 0o640)
+        src = Path(self._tmp.name) / "src.html"
+        src.write_text("copied", encoding="utf-8")
+        staging.copy_if_changed(src, self.dest)
+        self.assertEqual(self.dest.stat().st_mode & 0o777, 0o640)
+
+    def test_copy_if_changed(self):
+        src = Path(self._tmp.name) / "src.html"
+        src.write_text("same", encoding="utf-8")
+        self.assertTrue(staging.copy_if_changed(src, self.dest))
+        self.assertFalse(staging.copy_if_changed(src, self.dest))
+        self.assertEqual(self.dest.read_text(encoding="utf-8"), "same")
+
+
+if __name__ == "__main__":
+    unittest.main()
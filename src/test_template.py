@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from escaping import SafeString
+from template import Template, TemplateError, compile_template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, name, text):
+        path = self.dir / name
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    def test_slots_are_split_out(self):
+        template = compile_template(self.write("t.html", "<title>{{ Title }}</title>{{Content}}!"))
+        self.assertEqual(template.literals, ("<title>", "</title>", "!"))
+        self.assertEqual(template.slots, ("Title", "Content"))
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": SafeString("<p>x</p>")}),
+            "<title>Hi</title><p>x</p>!",
+        )
+
+    def test_string_values_are_escaped(self):
+        template = compile_template(self.write("t.html", "<title>{{ Title }}</title>{{Content}}"))
+        context = {"Title": "Fish & <Chips>", "Content": SafeString("<p>&amp;</p>")}
+        expected = "<title>Fish &amp; &lt;Chips&gt;</title><p>&amp;</p>"
+        self.assertEqual(template.render(context), expected)
+        self.assertEqual("".join(template.iter_render(context)), expected)
+
+    def test_resolver_rewrites_literal_attributes_once(self):
+        template = compile_template(self.write("t.html", '<link href="/a.css"><img src="x.png">{{ Content }}'))
+        resolve = lambda url: "/base" + url if url.startswith("/") else url
+        html = "".join(template.iter_render({"Content": 'href="/raw"'}, resolve))
+        self.assertEqual(html, '<link href="/base/a.css"><img src="x.png">href="/raw"')
+        self.assertIs(template.resolved_literals(resolve), template.resolved_literals(resolve))
+        self.assertEqual(template.render({"Content": ""}), '<link href="/a.css"><img src="x.png">')
+
+    def test_missing_slot_raises(self):
+        template = Template(("a", "b"), ("Title",))
+        with self.assertRaises(TemplateError) as ctx:
+            template.render({})
+        self.assertIn("Title", str(ctx.exception))
+
+    def test_no_slots(self):
+        template = compile_template(self.write("t.html", "static only"))
+        self.assertEqual(template.render({}), "static only")
+
+    def test_include(self):
+        self.write("nav.html", "<nav>{{ Title }}</nav>")
+        path = self.write("t.html", '<body>{% include "nav.html" %}{{ Content }}</body>')
+        self.assertEqual(
+            compile_template(path).render({"Title": "T", "Content": "C"}),
+            "<body><nav>T</nav>C</body>",
+        )
+
+    def test_extends_overrides_blocks(self):
+        self.write(
+            "base.html",
+            "<head>{% block head %}<title>{{ Title }}</title>{% endblock %}</head>"
+            "<main>{% block main %}default{% endblock %}</main>",
+        )
+        path = self.write(
+            "post.html",
+            '{% extends "base.html" %}\nignored{% block main %}<article>{{ Content }}</article>{% endblock %}',
+        )
+        self.assertEqual(
+            compile_template(path).render({"Title": "T", "Content": "C"}),
+            "<head><title>T</title></head><main><article>C</article></main>",
+        )
+
+    def test_include_cycle_raises(self):
+        self.write("a.html", '{% include "b.html" %}')
+        self.write("b.html", '{% include "a.html" %}')
+        with self.assertRaises(TemplateError):
+            compile_template(self.dir / "a.html")
+
+    def test_unclosed_block_raises(self):
+        with self.assertRaises(TemplateError):
+            compile_template(self.write("t.html", "{% block main %}x"))
+
+    def test_digest_changes_with_content(self):
+        a = compile_template(self.write("a.html", "<p>{{ Content }}</p>"))
+        b = compile_template(self.write("b.html", "<div>{{ Content }}</div>"))
+        c = compile_template(self.write("c.html", "<p>{{ Content }}</p>"))
+        self.assertNotEqual(a.digest, b.digest)
+        self.assertEqual(a.digest, c.digest)
+
+    def test_load_template_caches_until_partial_changes(self):
+        partial = self.write("nav.html", "one")
+        path = self.write("t.html", '{% include "nav.html" %}')
+        first = load_template(path)
+        self.assertIs(load_template(path), first)
+        partial.write_text("two", encoding="utf-8")
+        stat = partial.stat()
+        os.utime(partial, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        second = load_template(path)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.render({}), "two")
+
+
+if __name__ == "__main__":
+    unittest.main()
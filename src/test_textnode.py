@@ -33,6 +33,9 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("link", TextType.LINK, "https://www.github.com")
         self.assertEqual(node, node2)
 
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(TextNode("x", TextType.TEXT), "__dict__"))
+
 class TestTextNodeToHtmlNode(unittest.TestCase):
     def test_text(self):
         node = TextNode("This is a text node", TextType.TEXT)
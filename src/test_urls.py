@@ -0,0 +1,68 @@
+import unittest
+
+from urls import assets_digest, basepath_resolver, configure_assets, rewrite_url_attributes
+
+
+class TestBasepathResolver(unittest.TestCase):
+    def test_root_needs_no_resolver(self):
+        self.assertIsNone(basepath_resolver("/"))
+
+    def test_site_absolute_urls_move_under_basepath(self):
+        resolve = basepath_resolver("/repo/")
+        self.assertEqual(resolve("/"), "/repo/")
+        self.assertEqual(resolve("/blog/a.html"), "/repo/blog/a.html")
+
+    def test_other_urls_are_untouched(self):
+        resolve = basepath_resolver("/repo/")
+        for url in ("https://example.com/", "//cdn.example.com/x.js", "page.html", "#top", ""):
+            self.assertEqual(resolve(url), url)
+
+    def test_missing_trailing_slash(self):
+        self.assertEqual(basepath_resolver("/repo")("/a"), "/repo/a")
+
+    def test_resolver_is_shared_per_basepath(self):
+        self.assertIs(basepath_resolver("/repo/"), basepath_resolver("/repo/"))
+
+
+class TestAssetResolver(unittest.TestCase):
+    def setUp(self):
+        configure_assets({"/index.css": "/index.3f2a9c1b.css", "/img/a.png": "/img/a.0011aabb.png"})
+
+    def tearDown(self):
+        configure_assets(None)
+
+    def test_assets_at_root(self):
+        resolve = basepath_resolver("/")
+        self.assertEqual(resolve("/index.css"), "/index.3f2a9c1b.css")
+        self.assertEqual(resolve("/img/a.png?x=1#top"), "/img/a.0011aabb.png?x=1#top")
+        self.assertEqual(resolve("/blog/"), "/blog/")
+        self.assertEqual(resolve("https://example.com/index.css"), "https://example.com/index.css")
+
+    def test_assets_under_basepath(self):
+        self.assertEqual(basepath_resolver("/repo/")("/index.css"), "/repo/index.3f2a9c1b.css")
+
+    def test_reconfiguring_replaces_resolvers(self):
+        resolve = basepath_resolver("/")
+        digest = assets_digest()
+        configure_assets(None)
+        self.assertIsNone(basepath_resolver("/"))
+        self.assertEqual(assets_digest(), "")
+        configure_assets({"/index.css": "/index.3f2a9c1b.css", "/img/a.png": "/img/a.0011aabb.png"})
+        self.assertIsNot(basepath_resolver("/"), resolve)
+        self.assertEqual(assets_digest(), digest)
+
+
+class TestRewriteUrlAttributes(unittest.TestCase):
+    def test_rewrites_href_and_src(self):
+        html = '<link href="/a.css"><script src="/b.js"></script><a data-href="/c">'
+        self.assertEqual(
+            rewrite_url_attributes(html, basepath_resolver("/r/")),
+            '<link href="/r/a.css"><script src="/r/b.js"></script><a data-href="/c">',
+        )
+
+    def test_no_resolver(self):
+        self.assertEqual(rewrite_url_attributes('<a href="/x">', None), '<a href="/x">')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from content_index import ContentIndex
+from manifest import BuildManifest
+from watch import SiteWatcher
+
+
+def touch(path, text):
+    """Write text and push the mtime forward so the change is visible to polling."""
+    path.write_text(text, encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+
+
+class TestSiteWatcher(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        self.content = root / "content"
+        self.static = root / "static"
+        self.docs = root / "docs"
+        self.template = root / "template.html"
+        self.content.mkdir()
+        self.static.mkdir()
+        (self.content / "index.md").write_text("# Home", encoding="utf-8")
+        (self.content / "about.md").write_text("# About", encoding="utf-8")
+        (self.static / "a.css").write_text("a", encoding="utf-8")
+        self.template.write_text("<title>{{ Title }}</title>", encoding="utf-8")
+        self.watcher = SiteWatcher(
+            str(self.content), str(self.static), str(self.template), str(self.docs), "/", BuildManifest(self.docs)
+        )
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def poll(self):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            rebuilt = self.watcher.poll()
+        return rebuilt, out.getvalue()
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.poll(), (False, ""))
+
+    def test_markdown_change_rebuilds_only_that_page(self):
+        touch(self.content / "about.md", "# About us")
+        rebuilt, log = self.poll()
+        self.assertTrue(rebuilt)
+        self.assertEqual(log.count("Generating page"), 1)
+        self.assertEqual((self.docs / "about.html").read_text(encoding="utf-8"), "<title>About us</title>")
+        self.assertFalse((self.docs / "index.html").exists())
+
+    def test_pages_are_not_parsed_on_start(self):
+        self.assertEqual(self.watcher.pages, {})
+
+    def test_template_change_rerenders_without_reparsing(self):
+        touch(self.template, "<h1>{{ Title }}</h1>")
+        rebuilt, log = self.poll()
+        self.assertEqual(log.count("Generating page"), 2)
+        self.assertEqual((self.docs / "index.html").read_text(encoding="utf-8"), "<h1>Home</h1>")
+        parsed = dict(self.watcher.pages)
+        self.assertEqual(len(parsed), 2)
+        touch(self.template, "<h2>{{ Title }}</h2>")
+        self.poll()
+        self.assertEqual((self.docs / "index.html").read_text(encoding="utf-8"), "<h2>Home</h2>")
+        for path, page in parsed.items():
+            self.assertIs(self.watcher.pages[path], page)
+
+    def test_page_without_title_is_skipped(self):
+        (self.content / "draft.md").write_text("no title yet", encoding="utf-8")
+        watcher = SiteWatcher(str(self.content), str(self.static), str(self.template), str(self.docs))
+        touch(self.template, "<h1>{{ Title }}</h1>")
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            watcher.poll()
+        self.assertIn("Skipping", out.getvalue())
+        self.assertEqual(out.getvalue().count("Generating page"), 2)
+        self.assertFalse((self.docs / "draft.html").exists())
+
+    def test_broken_template_is_skipped(self):
+        touch(self.template, "{% block x %}")
+        rebuilt, log = self.poll()
+        self.assertIn("Template error", log)
+        self.assertFalse((self.docs / "index.html").exists())
+
+    def test_removed_page_is_deleted(self):
+        touch(self.content / "about.md", "# About us")
+        self.poll()
+        (self.content / "about.md").unlink()
+        self.poll()
+        self.assertFalse((self.docs / "about.html").exists())
+        self.assertNotIn("about.html", self.watcher.manifest.entries)
+
+    def test_removed_page_keeps_unparsed_outputs(self):
+        # Render every page, as the build does, then watch with nothing parsed yet.
+        touch(self.template, "<h1>{{ Title }}</h1>")
+        self.poll()
+        (self.content / "blog").mkdir()
+        (self.content / "blog" / "a.md").write_text("# A", encoding="utf-8")
+        self.poll()
+        self.watcher = SiteWatcher(
+            str(self.content), str(self.static), str(self.template), str(self.docs), "/", self.watcher.manifest
+        )
+        (self.content / "about.md").unlink()
+        rebuilt, log = self.poll()
+        self.assertEqual(log.count("Removed page"), 1)
+        self.assertFalse((self.docs / "about.html").exists())
+        self.assertEqual((self.docs / "index.html").read_text(encoding="utf-8"), "<h1>Home</h1>")
+        self.assertEqual((self.docs / "blog" / "a.html").read_text(encoding="utf-8"), "<h1>A</h1>")
+        self.assertIn("index.html", self.watcher.manifest.entries)
+
+    def test_static_change_syncs_one_file(self):
+        touch(self.static / "a.css", "b")
+        self.poll()
+        self.assertEqual((self.docs / "a.css").read_text(encoding="utf-8"), "b")
+        self.assertEqual(self.watcher.manifest.static, ["a.css"])
+
+    def test_static_hardlink(self):
+        self.watcher.hardlink = True
+        touch(self.static / "a.css", "b")
+        self.poll()
+        self.assertTrue(os.path.samefile(self.static / "a.css", self.docs / "a.css"))
+
+    def test_content_index_follows_edits(self):
+        index = ContentIndex.load(self.docs / ".content-index.json")
+        index.update(self.content)
+        self.watcher.index = index
+        touch(self.content / "about.md", "# About us\n\n[home](/)")
+        self.poll()
+        page = index.page("about.md")
+        self.assertEqual((page["title"], page["links"]), ("About us", ["/"]))
+        (self.content / "about.md").unlink()
+        self.poll()
+        self.assertIsNone(index.page("about.md"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import functools
+import hashlib
+import json
+import re
+
+# Attributes whose values are URLs and go through the resolver.
+URL_ATTRIBUTES = frozenset(("href", "src"))
+
+# Site-absolute asset URL -> its fingerprinted URL (see assets.py); empty when off.
+_assets: dict = {}
+_assets_digest = ""
+
+# href="..." and src="..." in literal template HTML.
+_URL_ATTRIBUTE = re.compile(r'(?<![\w-])(href|src)="([^"]*)"')
+
+
+def configure_assets(mapping: dict | None) -> None:
+    """
+    Make every resolver map the site-absolute asset URLs in mapping (e.g. "/index.css")
+    to their fingerprinted URLs ("/index.3f2a9c1b.css"). None or {} turns that off.
+    """
+    global _assets, _assets_digest
+    _assets = dict(mapping or {})
+    _assets_digest = ""
+    if _assets:
+        _assets_digest = hashlib.sha256(json.dumps(sorted(_assets.items())).encode("utf-8")).hexdigest()
+    basepath_resolver.cache_clear()
+
+
+def assets() -> dict:
+    """The asset URL mapping set by configure_assets."""
+    return _assets
+
+
+def assets_digest() -> str:
+    """A hash of the asset URL mapping ("" when there is none), for build fingerprints and cache keys."""
+    return _assets_digest
+
+
+def _split_url(url: str) -> tuple:
+    """Split url into its path and its ?query#fragment tail."""
+    for i, char in enumerate(url):
+        if char in "?#":
+            return url[:i], url[i:]
+    return url, ""
+
+
+@functools.lru_cache(maxsize=None)
+def basepath_resolver(basepath: str = "/"):
+    """
+    Return a resolver that moves site-absolute URLs ("/blog/x") under basepath
+    (e.g. GitHub Pages "/repo/"), after swapping fingerprinted names in for asset
+    URLs (see configure_assets). Returns None when there is nothing to change.
+    External, relative and protocol-relative ("//cdn...") URLs are left alone.
+    The same basepath returns the same resolver object until the assets change.
+    """
+    asset_urls = _assets
+    if basepath == "/" and not asset_urls:
+        return None
+    if not basepath.endswith("/"):
+        basepath += "/"
+
+    def resolve(url: str) -> str:
+        if not url.startswith("/") or url.startswith("//"):
+            return url
+        if asset_urls:
+            path, tail = _split_url(url)
+            url = asset_urls.get(path, path) + tail
+        return basepath + url[1:]
+
+    return resolve
+
+
+def rewrite_url_attributes(html: str, resolve_url) -> str:
+    """Apply resolve_url to every href and src attribute in a fragment of literal HTML."""
+    if resolve_url is None:
+        return html
+    return _URL_ATTRIBUTE.sub(lambda m: f'{m.group(1)}="{resolve_url(m.group(2))}"', html)
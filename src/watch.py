@@ -0,0 +1,170 @@
+import time
+from pathlib import Path
+
+from content_index import ContentIndex
+from copy_static import sync_file
+from gencontent import decode_markdown, fill_template, page_summary, parse_page, write_page
+from manifest import BuildManifest, hash_file, page_fingerprint
+from template import load_template
+from urls import assets_digest
+
+
+def _snapshot(paths) -> dict:
+    """Map each existing file in paths to its (mtime, size)."""
+    snapshot = {}
+    for path in paths:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def _changes(before: dict, after: dict) -> tuple:
+    """Return (changed or added, removed) paths between two snapshots, sorted."""
+    changed = sorted(p for p, sig in after.items() if before.get(p) != sig)
+    removed = sorted(p for p in before if p not in after)
+    return changed, removed
+
+
+class SiteWatcher:
+    """
+    Polls the content, static and template files of a built site and regenerates
+    only what each change affects. Pages are parsed when first needed, not on start
+    (the build just parsed them all, possibly in other processes), and then kept in
+    memory: the first template edit parses every page not yet edited, and later
+    template edits re-render without re-parsing any markdown. A content index, if
+    given, is kept up to date from the same parses. Static files are synced with the
+    build's compare and link options (see copy_static.sync_file).
+    """
+
+    def __init__(
+        self,
+        content_dir: str,
+        static_dir: str,
+        template_path: str,
+        dest_dir: str,
+        basepath: str = "/",
+        manifest: BuildManifest | None = None,
+        index: ContentIndex | None = None,
+        static_compare: str = "mtime",
+        hardlink: bool = False,
+    ):
+        self.content_dir = Path(content_dir)
+        self.static_dir = Path(static_dir)
+        self.template_path = template_path
+        self.dest_dir = Path(dest_dir)
+        self.basepath = basepath
+        self.manifest = manifest
+        self.index = index
+        self.static_compare = static_compare
+        self.hardlink = hardlink
+        # Source path -> parsed Document, for the pages parsed so far: those edited
+        # since the watcher started, or every page once the template has changed.
+        self.pages = {}
+        self._content = self._scan_content()
+        self._static = self._scan_static()
+        self._template = self._scan_template()
+
+    def _scan_content(self) -> dict:
+        return _snapshot(self.content_dir.rglob("*.md"))
+
+    def _scan_static(self) -> dict:
+        return _snapshot(p for p in self.static_dir.rglob("*") if p.is_file())
+
+    def _scan_template(self) -> dict:
+        # A compiled template knows its layouts and partials, so those are watched too.
+        try:
+            return _snapshot(load_template(self.template_path).dependencies)
+        except (OSError, ValueError):
+            return {}
+
+    def _dest(self, md_file: Path) -> Path:
+        return self.dest_dir / md_file.relative_to(self.content_dir).with_suffix(".html")
+
+    def _parse(self, md_file: Path) -> dict | None:
+        """
+        Parse md_file into pages and return its page summary, or None if it can't be
+        read or parsed, keeping the last good version of the page while it is edited.
+        """
+        try:
+            source = md_file.read_bytes()
+            self.pages[md_file] = parse_page(decode_markdown(source), str(md_file))
+        except (OSError, ValueError) as e:
+            print(f"Skipping {md_file}: {e}")
+            return None
+        return page_summary(source, self.pages[md_file])
+
+    def _write(self, md_file: Path) -> None:
+        document = self.pages[md_file]
+        dest = self._dest(md_file)
+        print(f"Generating page from {md_file} to {dest} using {self.template_path}")
+        write_page(str(dest), fill_template(document.title, document.node, self.template_path, self.basepath))
+        if self.manifest is not None:
+            template_hash = load_template(self.template_path).digest
+            fingerprint = page_fingerprint(hash_file(md_file), template_hash, self.basepath, assets_digest())
+            self.manifest.record(dest, fingerprint)
+
+    def poll(self) -> bool:
+        """Check for changes once and apply them. Returns True if anything was rebuilt."""
+        content = self._scan_content()
+        static = self._scan_static()
+        template = self._scan_template()
+        changed_pages, removed_pages = _changes(self._content, content)
+        changed_static, removed_static = _changes(self._static, static)
+        template_changed = template != self._template
+        try:
+            load_template(self.template_path)
+        except (OSError, ValueError) as e:
+            # A half-edited template: leave page changes pending until it compiles again.
+            print(f"Template error: {e}")
+            content, changed_pages, removed_pages, template_changed = self._content, [], [], False
+        self._content, self._static, self._template = content, static, template
+
+        parsed = {}
+        for md_file in changed_pages:
+            summary = self._parse(md_file)
+            if summary is None:
+                continue
+            parsed[str(md_file)] = summary
+            if not template_changed:
+                self._write(md_file)
+        if template_changed:
+            print(f"Template changed, re-rendering {len(content)} page(s)")
+            for md_file in sorted(content):
+                if md_file in self.pages or self._parse(md_file) is not None:
+                    self._write(md_file)
+        for md_file in removed_pages:
+            self.pages.pop(md_file, None)
+            dest = self._dest(md_file)
+            dest.unlink(missing_ok=True)
+            print(f"Removed page {dest}")
+        if removed_pages and self.manifest is not None:
+            # From the snapshot: pages holds only what was parsed since the watcher started.
+            self.manifest.remove_stale({self._dest(p) for p in content})
+        if self.index is not None and (changed_pages or removed_pages):
+            self.index.update(self.content_dir, parsed)
+            self.index.save()
+
+        for path in changed_static:
+            sync_file(path, self.dest_dir / path.relative_to(self.static_dir), self.static_compare, self.hardlink)
+        for path in removed_static:
+            (self.dest_dir / path.relative_to(self.static_dir)).unlink(missing_ok=True)
+        if self.manifest is not None and (changed_static or removed_static):
+            self.manifest.static = sorted(p.relative_to(self.static_dir).as_posix() for p in static)
+
+        rebuilt = bool(changed_pages or removed_pages or changed_static or removed_static or template_changed)
+        if rebuilt and self.manifest is not None:
+            self.manifest.save()
+        return rebuilt
+
+    def run(self, interval: float = 0.5) -> None:
+        """Poll every interval seconds until interrupted."""
+        print(f"Watching {self.content_dir}, {self.static_dir} and {self.template_path} for changes...")
+        try:
+            while True:
+                time.sleep(interval)
+                self.poll()
+        except KeyboardInterrupt:
+            pass